@@ -0,0 +1,36 @@
+"""Create isbn_lookup_cache table
+
+Revision ID: 3aac144a35b1
+Revises: d1f07fe12e79
+Create Date: 2026-10-18 14:05:19.284611
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3aac144a35b1'
+down_revision: Union[str, Sequence[str], None] = 'd1f07fe12e79'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'isbn_lookup_cache',
+        sa.Column('isbn', sa.String(), nullable=False),
+        sa.Column('found', sa.Boolean(), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=True),
+        sa.Column('fetched_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('isbn')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('isbn_lookup_cache')
@@ -0,0 +1,40 @@
+"""Create upload_blobs table
+
+Revision ID: 8c41e2b7d905
+Revises: 3aac144a35b1
+Create Date: 2026-10-18 16:42:07.531902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41e2b7d905'
+down_revision: Union[str, Sequence[str], None] = '3aac144a35b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'upload_blobs',
+        sa.Column('digest', sa.String(length=64), nullable=False),
+        sa.Column('filename', sa.String(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+        sa.Column('variants', sa.Text(), nullable=True),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('digest'),
+        sa.UniqueConstraint('filename')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('upload_blobs')
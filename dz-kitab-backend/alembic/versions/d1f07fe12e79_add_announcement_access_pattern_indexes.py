@@ -0,0 +1,58 @@
+"""Add composite indexes for announcement access patterns
+
+Revision ID: d1f07fe12e79
+Revises: 0f8b63a18749
+Create Date: 2026-10-18 10:12:41.507213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1f07fe12e79'
+down_revision: Union[str, Sequence[str], None] = '0f8b63a18749'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, columns) - keep in sync with Announcement.__table_args__ in app/models/book.py
+ANNOUNCEMENT_INDEXES = [
+    # Public listing / recommendations: status + category filters, newest first
+    ('ix_announcements_status_category_created_at', ['status', 'category', 'created_at']),
+    # Keyset pagination without filters: ORDER BY created_at DESC, id DESC
+    ('ix_announcements_created_at_id', ['created_at', 'id']),
+    # My announcements, dashboard and admin per-seller counts
+    ('ix_announcements_user_id_status', ['user_id', 'status']),
+    # Join/lookups from books (search, popular books)
+    ('ix_announcements_book_id', ['book_id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, columns in ANNOUNCEMENT_INDEXES:
+            op.create_index(
+                name,
+                'announcements',
+                columns,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(ANNOUNCEMENT_INDEXES):
+            op.drop_index(
+                name,
+                table_name='announcements',
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
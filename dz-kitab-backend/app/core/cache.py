@@ -0,0 +1,246 @@
+# app/core/cache.py
+
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.conditional import is_not_modified, not_modified_response, validator_headers
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# "memory" (par processus) ou "redis" (partagé entre les workers gunicorn)
+# Avec plusieurs workers ou replicas (start.sh lance 4 workers gunicorn), CACHE_BACKEND=redis
+# est obligatoire : en mode "memory", une invalidation ne vide que le cache du worker qui
+# a traite l'ecriture, les autres servent des annonces perimees jusqu'a CACHE_DEFAULT_TTL
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL") or os.getenv("REDIS_URL")
+CACHE_DEFAULT_TTL = int(os.getenv("CACHE_DEFAULT_TTL", "30"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_KEY_PREFIX = "dzkitab:cache"
+
+# Namespaces des endpoints publics du catalogue
+ANNOUNCEMENTS_NAMESPACE = "announcements"
+RECOMMENDATIONS_NAMESPACE = "recommendations"
+CATEGORIES_NAMESPACE = "categories"
+CURRICULUMS_NAMESPACE = "curriculums"
+
+
+# ============================================
+# BACKENDS
+# ============================================
+
+class MemoryCacheBackend:
+    """Per-process LRU cache with per-entry TTL"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get_generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    def bump_generation(self, namespace: str) -> None:
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            # Old-generation entries can never be read again: drop them right away
+            prefix = f"{namespace}:"
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+
+class RedisCacheBackend:
+    """
+    Cache shared by all workers. Eviction is left to Redis (maxmemory-policy allkeys-lru);
+    invalidation bumps a per-namespace generation counter that is part of every key.
+    """
+
+    def __init__(self, url: str):
+        import redis  # dépendance optionnelle
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5)
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self._client.get(f"{CACHE_KEY_PREFIX}:{key}")
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        self._client.set(f"{CACHE_KEY_PREFIX}:{key}", json.dumps(value), ex=ttl)
+
+    def delete(self, key: str) -> None:
+        self._client.delete(f"{CACHE_KEY_PREFIX}:{key}")
+
+    def get_generation(self, namespace: str) -> int:
+        return int(self._client.get(f"{CACHE_KEY_PREFIX}:gen:{namespace}") or 0)
+
+    def bump_generation(self, namespace: str) -> None:
+        self._client.incr(f"{CACHE_KEY_PREFIX}:gen:{namespace}")
+
+    def clear(self) -> None:
+        for key in self._client.scan_iter(f"{CACHE_KEY_PREFIX}:*"):
+            self._client.delete(key)
+
+
+# ============================================
+# RESPONSE CACHE
+# ============================================
+
+class ResponseCache:
+    """
+    Cache of JSON-ready response bodies keyed on (namespace, normalized parameters).
+
+    Backend errors never fail a request: the cache is simply bypassed.
+    """
+
+    def __init__(self, backend, default_ttl: int = CACHE_DEFAULT_TTL):
+        self.backend = backend
+        self.default_ttl = default_ttl
+
+    @staticmethod
+    def normalize_params(params: Dict[str, Any]) -> str:
+        """Drop empty values and sort keys so equivalent query strings share one entry"""
+        normalized = {
+            key: value.value if hasattr(value, "value") else value
+            for key, value in params.items()
+            if value is not None and value != ""
+        }
+        return json.dumps(normalized, sort_keys=True, default=str, separators=(",", ":"))
+
+    def make_key(self, namespace: str, params: Dict[str, Any]) -> Optional[str]:
+        """Build the entry key, or None when the backend is unreachable (cache bypassed)"""
+        digest = hashlib.sha1(self.normalize_params(params).encode()).hexdigest()
+        try:
+            generation = self.backend.get_generation(namespace)
+        except Exception as e:
+            print(f" Cache read error: {e}")
+            return None
+        return f"{namespace}:{generation}:{digest}"
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            print(f" Cache read error: {e}")
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        try:
+            self.backend.set(key, value, ttl or self.default_ttl)
+        except Exception as e:
+            print(f" Cache write error: {e}")
+
+    def delete(self, namespace: str, params: Dict[str, Any]) -> None:
+        """Drop a single entry (e.g. one announcement detail) without touching its namespace"""
+        key = self.make_key(namespace, params)
+        if not key:
+            return
+        try:
+            self.backend.delete(key)
+        except Exception as e:
+            print(f" Cache write error: {e}")
+
+    def invalidate(self, *namespaces: str) -> None:
+        for namespace in namespaces:
+            try:
+                self.backend.bump_generation(namespace)
+            except Exception as e:
+                print(f" Cache invalidation error ({namespace}): {e}")
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+def build_response_cache() -> ResponseCache:
+    if CACHE_BACKEND == "redis" and CACHE_REDIS_URL:
+        try:
+            return ResponseCache(RedisCacheBackend(CACHE_REDIS_URL))
+        except Exception as e:
+            print(f" Redis cache unavailable, using in-process cache: {e}")
+    return ResponseCache(MemoryCacheBackend())
+
+
+response_cache = build_response_cache()
+
+
+def cached_response(
+    namespace: str,
+    params: Dict[str, Any],
+    builder: Callable[[], Any],
+    ttl: Optional[int] = None,
+    postprocess: Optional[Callable[[Any], Any]] = None,
+    request: Optional[Request] = None,
+    validators: Optional[Callable[[Any], Tuple[str, Optional[datetime]]]] = None
+) -> Response:
+    """
+    Return the cached body for (namespace, params), or call builder() and cache its result.
+
+    The builder's return value (Pydantic model, dict...) is stored in its JSON form,
+    so a hit skips both the database and response-model serialization.
+    postprocess, if given, adjusts the body on every request (it is not cached).
+    validators, if given, returns (ETag, Last-Modified) for a body: matching
+    conditional requests get an empty 304 instead of the serialized body.
+    """
+    key = response_cache.make_key(namespace, params)
+    content = response_cache.get(key) if key else None
+    cache_status = "HIT"
+    if content is None:
+        content = jsonable_encoder(builder())
+        if key:
+            response_cache.set(key, content, ttl)
+        cache_status = "MISS"
+
+    headers = {"X-Cache": cache_status}
+    if validators:
+        etag, last_modified = validators(content)
+        if request is not None and is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified, headers)
+        headers.update(validator_headers(etag, last_modified))
+
+    if postprocess:
+        content = postprocess(content)
+    return JSONResponse(content=content, headers=headers)
+
+
+def invalidate_catalog_cache() -> None:
+    """Called after any write that changes what the public announcement endpoints return"""
+    response_cache.invalidate(ANNOUNCEMENTS_NAMESPACE, RECOMMENDATIONS_NAMESPACE)
@@ -0,0 +1,109 @@
+# app/core/conditional.py
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+
+# Les clients doivent revalider (If-None-Match) avant de réutiliser leur copie
+CONDITIONAL_CACHE_CONTROL = "public, no-cache"
+
+# Donnees du livre et du vendeur recopiees dans chaque annonce (reponse complete ou carte) :
+# elles changent sans toucher a l'updated_at de l'annonce
+EMBEDDED_ANNOUNCEMENT_FIELDS = ("book", "user", "title", "cover_image_url", "cover_thumbnail_url", "seller_username")
+
+
+def weak_etag(parts: Any) -> str:
+    """
+    Weak ETag over a JSON-able validator (ids, timestamps...).
+
+    Weak because counters such as views_count are left out: two bodies with the same
+    ETag are semantically equivalent, not byte-identical.
+    """
+    digest = hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if value.tzinfo is None:
+        # SQLite returns naive timestamps, stored in UTC
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def announcement_version(item: Dict[str, Any]) -> Tuple[Any, Any, Dict[str, Any]]:
+    """
+    (id, last change, embedded book/seller data) of an announcement body, the unit all
+    catalog ETags are built from
+    """
+    embedded = {field: item[field] for field in EMBEDDED_ANNOUNCEMENT_FIELDS if field in item}
+    return item.get("id"), item.get("updated_at") or item.get("created_at"), embedded
+
+
+def announcement_validators(item: Dict[str, Any]) -> Tuple[str, Optional[datetime]]:
+    """ETag and Last-Modified of a single announcement"""
+    version = announcement_version(item)
+    return weak_etag(version), _parse_timestamp(version[1])
+
+
+def collection_validators(items: Iterable[Dict[str, Any]], *extra: Any) -> Tuple[str, None]:
+    """
+    ETag of a page of announcements (plus extra validator parts), without Last-Modified:
+    the newest updated_at of a page does not move when a row is deleted or the order
+    changes, so If-Modified-Since would validate stale pages.
+    """
+    versions = [announcement_version(item) for item in items]
+    return weak_etag([versions, list(extra)]), None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison (RFC 9110 8.8.3.2) against an If-None-Match header"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """If-None-Match wins; If-Modified-Since is only used when no ETag was sent"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": CONDITIONAL_CACHE_CONTROL}
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def not_modified_response(etag: str, last_modified: Optional[datetime], headers: Optional[Dict[str, str]] = None) -> Response:
+    """Empty 304 carrying the validators (the body is never serialized)"""
+    return Response(status_code=304, headers={**(headers or {}), **validator_headers(etag, last_modified)})
@@ -0,0 +1,110 @@
+# app/core/http_clients.py
+
+import os
+from typing import Dict, Optional
+
+import httpx
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# HTTP/2 multiplexing (requires the optional "h2" package: pip install httpx[http2])
+HTTP_CLIENT_HTTP2 = os.getenv("HTTP_CLIENT_HTTP2", "0") == "1"
+
+# Per-provider limits and timeouts (seconds)
+PROVIDER_SETTINGS: Dict[str, Dict] = {
+    "openlibrary": {
+        "base_url": "https://openlibrary.org",
+        "timeout": httpx.Timeout(10.0, connect=5.0),
+        "limits": httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0),
+    },
+    "babelio": {
+        "base_url": "https://www.babelio.com",
+        "timeout": httpx.Timeout(10.0, connect=5.0),
+        "limits": httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=30.0),
+        "follow_redirects": True,
+    },
+    "google_books": {
+        "base_url": "https://www.googleapis.com",
+        "timeout": httpx.Timeout(10.0, connect=5.0),
+        "limits": httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0),
+    },
+    # Cover images (absolute URLs on the providers' image hosts). Redirects are followed
+    # by cover_cache.download_cover, which checks every target against the allow-list
+    "covers": {
+        "timeout": httpx.Timeout(15.0, connect=5.0),
+        "limits": httpx.Limits(max_connections=8, max_keepalive_connections=4, keepalive_expiry=30.0),
+        "follow_redirects": False,
+    },
+}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401  dépendance optionnelle
+    except ImportError:
+        return False
+    return True
+
+
+# ============================================
+# REGISTRY
+# ============================================
+
+class HttpClientRegistry:
+    """
+    One pooled httpx.AsyncClient per outbound provider, shared for the application lifetime.
+
+    Connections are kept alive between lookups instead of paying a TCP+TLS handshake per call.
+    Clients are opened at startup and closed at shutdown (see app/main.py); get() also creates
+    them lazily so scripts can use the providers without the app.
+
+    Tests swap the network out with use_transport(httpx.MockTransport(handler)).
+    """
+
+    def __init__(self, settings: Dict[str, Dict] = PROVIDER_SETTINGS, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.settings = settings
+        self.transport = transport
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def _build(self, name: str) -> httpx.AsyncClient:
+        if name not in self.settings:
+            raise KeyError(f"Unknown HTTP provider: {name}")
+        options = dict(self.settings[name])
+        if self.transport is not None:
+            options["transport"] = self.transport
+        else:
+            options["http2"] = HTTP_CLIENT_HTTP2 and _http2_available()
+        return httpx.AsyncClient(**options)
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Shared client of a provider ("openlibrary", "babelio", "google_books")"""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._build(name)
+            self._clients[name] = client
+        return client
+
+    async def open(self) -> None:
+        """Create every provider client (application startup)"""
+        for name in self.settings:
+            self.get(name)
+
+    async def aclose(self) -> None:
+        """Close every client and its pooled connections (application shutdown)"""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    async def use_transport(self, transport: Optional[httpx.AsyncBaseTransport]) -> None:
+        """Route all providers through another transport (e.g. httpx.MockTransport in tests)"""
+        await self.aclose()
+        self.transport = transport
+
+
+http_clients = HttpClientRegistry()
+
+
+def get_http_client(name: str) -> httpx.AsyncClient:
+    return http_clients.get(name)
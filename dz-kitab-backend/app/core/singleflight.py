@@ -0,0 +1,39 @@
+# app/core/singleflight.py
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """
+    In-process request coalescing: concurrent calls with the same key share one execution.
+
+    The first caller starts factory() as a task; callers arriving while it runs await the
+    same task. A caller that gets cancelled (client disconnect) does not cancel the shared
+    work for the others. The key is forgotten as soon as the task finishes, so nothing is cached.
+
+    do() returns (result, started): started is True only for the caller that launched the
+    work, so follow-up side effects (e.g. persisting the result) run once.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        task = self._inflight.get(key)
+        started = task is None
+        if started:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task), started
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,232 @@
+# app/core/static_files.py
+
+import os
+import re
+import stat
+import hashlib
+import mimetypes
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Receive, Scope, Send
+
+from app.core.conditional import etag_matches
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# Noms versionnes par le contenu (SHA-256 des uploads, hash de l'URL source des couvertures) :
+# le fichier derriere une URL ne change jamais
+IMMUTABLE_NAME_PATTERN = re.compile(r"^[0-9a-f]{64}(-\d+)?\.[a-z]+$|^\d+-[0-9a-f]{10}-\d+\.webp$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Anciens uploads (noms uuid4) : revalidation par ETag apres un jour
+UPLOADS_CACHE_CONTROL = os.getenv("UPLOADS_CACHE_CONTROL", "public, max-age=86400")
+
+# Variantes servies a la place d'une image quand le client les annonce dans Accept,
+# par ordre de preference (fichier voisin de meme nom : x.jpg -> x.avif / x.webp, x-320.webp -> x-320.avif)
+NEGOTIATED_FORMATS = (("image/avif", ".avif"), ("image/webp", ".webp"))
+NEGOTIABLE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+IMAGE_MEDIA_TYPES = {
+    ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png",
+    ".gif": "image/gif", ".webp": "image/webp", ".avif": "image/avif",
+}
+
+# Envoi des octets delegue au proxy : "" (Python), "x-accel-redirect" (nginx) ou "x-sendfile" (Apache, lighttpd)
+UPLOADS_OFFLOAD = os.getenv("UPLOADS_OFFLOAD", "").lower()
+# Location nginx "internal" qui pointe sur le dossier uploads (mode x-accel-redirect)
+UPLOADS_ACCEL_PREFIX = os.getenv("UPLOADS_ACCEL_PREFIX", "/internal-uploads").rstrip("/")
+
+RANGE_CHUNK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+# ============================================
+# HELPERS
+# ============================================
+
+def accepts(accept: str, media_type: str) -> bool:
+    """True if the Accept header lists media_type explicitly with q > 0 (wildcards do not count)"""
+    for part in accept.split(","):
+        fields = part.strip().split(";")
+        if fields[0].strip().lower() != media_type:
+            continue
+        for param in fields[1:]:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def cache_control_for(name: str) -> str:
+    return IMMUTABLE_CACHE_CONTROL if IMMUTABLE_NAME_PATTERN.match(name) else UPLOADS_CACHE_CONTROL
+
+
+def strong_etag(name: str, stat_result: os.stat_result) -> str:
+    """
+    Strong ETag of a stored file from its name, size and mtime. A content-addressed
+    name only identifies the upload it was derived from: its WebP/AVIF variants change
+    with the encoder settings, and files are replaced atomically, so a rewrite always
+    gets a new ETag.
+    """
+    version = f"{name}:{stat_result.st_size}:{stat_result.st_mtime_ns}"
+    return f'"{hashlib.sha1(version.encode()).hexdigest()[:32]}"'
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) inclusive of a single "bytes=" range, None to ignore the header
+    (malformed or multiple ranges: the whole file is sent), RangeNotSatisfiable if
+    the range is outside the file.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+class FileRangeResponse(Response):
+    """206 Partial Content: one byte range of a file, read in chunks off the event loop"""
+
+    def __init__(self, path: str, start: int, end: int, size: int, headers: dict, media_type: str, method: str = "GET"):
+        headers = {
+            **headers,
+            "content-range": f"bytes {start}-{end}/{size}",
+            "content-length": str(end - start + 1),
+        }
+        super().__init__(status_code=206, headers=headers, media_type=media_type)
+        self.path = path
+        self.start = start
+        self.end = end
+        self.send_header_only = method.upper() == "HEAD"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_header_only:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(self.start)
+                remaining = self.end - self.start + 1
+                while remaining > 0:
+                    chunk = await file.read(min(RANGE_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+# ============================================
+# STATIC FILES
+# ============================================
+
+class UploadsStaticFiles(StaticFiles):
+    """
+    StaticFiles for /uploads with a cache policy, strong ETags, single byte ranges,
+    Accept-based selection of AVIF/WebP siblings, and optional X-Accel-Redirect /
+    X-Sendfile so a fronting proxy pushes the bytes.
+    """
+
+    def lookup_representation(self, path: str, accept: str):
+        """(full_path, stat_result, vary) of the file to send for path and Accept"""
+        full_path, stat_result = self.lookup_path(path)
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            return full_path, stat_result, False
+
+        base, ext = os.path.splitext(full_path)
+        if ext.lower() not in NEGOTIABLE_EXTENSIONS:
+            return full_path, stat_result, False
+
+        chosen, vary = None, False
+        for media_type, sibling_ext in NEGOTIATED_FORMATS:
+            if sibling_ext == ext.lower():
+                break
+            try:
+                sibling_stat = os.stat(base + sibling_ext)
+            except OSError:
+                continue
+            vary = True
+            if chosen is None and accepts(accept, media_type):
+                chosen = (base + sibling_ext, sibling_stat)
+        if chosen is not None:
+            return chosen[0], chosen[1], vary
+        return full_path, stat_result, vary
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+
+        request_headers = Headers(scope=scope)
+        try:
+            full_path, stat_result, vary = await anyio.to_thread.run_sync(
+                self.lookup_representation, path, request_headers.get("accept", "")
+            )
+        except PermissionError:
+            raise HTTPException(status_code=401)
+
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            raise HTTPException(status_code=404)
+        return self.representation_response(full_path, stat_result, scope, request_headers, vary)
+
+    def representation_response(self, full_path: str, stat_result: os.stat_result, scope: Scope, request_headers: Headers, vary: bool) -> Response:
+        name = os.path.basename(full_path)
+        ext = os.path.splitext(name)[1].lower()
+        media_type = IMAGE_MEDIA_TYPES.get(ext) or mimetypes.guess_type(name)[0] or "application/octet-stream"
+        etag = strong_etag(name, stat_result)
+        headers = {"etag": etag, "cache-control": cache_control_for(name), "accept-ranges": "bytes"}
+        if vary:
+            headers["vary"] = "Accept"
+
+        if etag_matches(request_headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        if UPLOADS_OFFLOAD in ("x-accel-redirect", "x-sendfile"):
+            # The proxy sends the file (and handles Range) from the internal location
+            if UPLOADS_OFFLOAD == "x-accel-redirect":
+                relative = Path(full_path).resolve().relative_to(Path(self.directory).resolve()).as_posix()
+                headers["x-accel-redirect"] = f"{UPLOADS_ACCEL_PREFIX}/{quote(relative)}"
+            else:
+                headers["x-sendfile"] = str(Path(full_path).resolve())
+            return Response(headers=headers, media_type=media_type)
+
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        # If-Range: a range from another version gets the whole new file (strong comparison)
+        if range_header and (not if_range or if_range.strip() == etag):
+            try:
+                byte_range = parse_range(range_header, stat_result.st_size)
+            except RangeNotSatisfiable:
+                return Response(status_code=416, headers={**headers, "content-range": f"bytes */{stat_result.st_size}"})
+            if byte_range is not None:
+                return FileRangeResponse(full_path, *byte_range, stat_result.st_size, headers, media_type, scope["method"])
+
+        return FileResponse(full_path, headers=headers, media_type=media_type, stat_result=stat_result, method=scope["method"])
@@ -0,0 +1,216 @@
+# app/core/storage.py
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# "local" (dossier uploads/, un seul serveur) ou "s3" (S3, MinIO, R2... partage entre les replicas)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+STORAGE_LOCAL_ROOT = Path(os.getenv("STORAGE_LOCAL_ROOT", "uploads"))
+STORAGE_LOCAL_BASE_URL = os.getenv("STORAGE_LOCAL_BASE_URL", "/uploads")
+
+S3_BUCKET = os.getenv("S3_BUCKET")
+# Endpoint d'un service compatible S3 (ex. MinIO en local : http://localhost:9000), vide pour AWS
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+S3_REGION = os.getenv("S3_REGION", "us-east-1")
+S3_ACCESS_KEY_ID = os.getenv("S3_ACCESS_KEY_ID")
+S3_SECRET_ACCESS_KEY = os.getenv("S3_SECRET_ACCESS_KEY")
+# URL publique des objets (CDN ou bucket public), par defaut {endpoint}/{bucket}
+S3_PUBLIC_BASE_URL = os.getenv("S3_PUBLIC_BASE_URL")
+# Duree de validite des URLs d'upload direct (secondes)
+STORAGE_PRESIGN_EXPIRES = int(os.getenv("STORAGE_PRESIGN_EXPIRES", "900"))
+
+# Les objets stockes sont nommes par leur contenu : ils ne changent jamais
+STORAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _read_umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Lu une seule fois au demarrage : os.umask() modifie le processus, pas sur entre threads
+STORED_FILE_MODE = 0o666 & ~_read_umask()
+
+
+class StorageError(Exception):
+    """Storage operation failed (missing object, unreachable service...)"""
+
+
+class StorageObjectNotFound(StorageError):
+    """The requested object does not exist"""
+
+
+# ============================================
+# BACKENDS
+# ============================================
+
+class LocalStorage:
+    """Files under a local directory, served by the app's /uploads static mount"""
+    name = "local"
+    supports_presigned_upload = False
+
+    def __init__(self, root: Path = STORAGE_LOCAL_ROOT, base_url: str = STORAGE_LOCAL_BASE_URL):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+
+    def path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root.resolve()):
+            raise StorageError(f"Invalid key: {key}")
+        return path
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).is_file()
+
+    def put_file(self, local_path: Path, key: str, content_type: Optional[str] = None) -> None:
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Copy next to the destination, then rename: readers never see a partial file
+        with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".part", delete=False) as tmp:
+            with open(local_path, "rb") as source:
+                shutil.copyfileobj(source, tmp)
+        # NamedTemporaryFile creates 0600: published files must stay readable by a fronting
+        # proxy running as another user (UPLOADS_OFFLOAD)
+        os.chmod(tmp.name, STORED_FILE_MODE)
+        os.replace(tmp.name, path)
+
+    def get_file(self, key: str, local_path: Path) -> None:
+        try:
+            shutil.copyfile(self.path(key), local_path)
+        except FileNotFoundError:
+            raise StorageObjectNotFound(f"Object not found: {key}")
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def presign_put(self, key: str, content_type: str, size: int, expires: int = STORAGE_PRESIGN_EXPIRES) -> str:
+        raise StorageError("Direct uploads require the s3 storage backend")
+
+
+class S3Storage:
+    """
+    Objects in an S3-compatible bucket (AWS S3, MinIO, Cloudflare R2...), shared by every
+    worker and replica. Clients can upload directly to the bucket with presigned PUT URLs.
+    """
+    name = "s3"
+    supports_presigned_upload = True
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = S3_ENDPOINT_URL,
+        region: str = S3_REGION,
+        access_key_id: Optional[str] = S3_ACCESS_KEY_ID,
+        secret_access_key: Optional[str] = S3_SECRET_ACCESS_KEY,
+        public_base_url: Optional[str] = S3_PUBLIC_BASE_URL,
+    ):
+        import boto3  # dépendance optionnelle
+        from botocore.config import Config
+
+        self.bucket = bucket
+        self._client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            # Path-style URLs (http://host/bucket/key) for MinIO and other self-hosted endpoints
+            config=Config(signature_version="s3v4", s3={"addressing_style": "path" if endpoint_url else "auto"}),
+        )
+        if public_base_url:
+            self.base_url = public_base_url.rstrip("/")
+        elif endpoint_url:
+            self.base_url = f"{endpoint_url.rstrip('/')}/{bucket}"
+        else:
+            self.base_url = f"https://{bucket}.s3.{region}.amazonaws.com"
+
+    def _is_missing(self, error) -> bool:
+        response = getattr(error, "response", None) or {}
+        return response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    @contextmanager
+    def _errors(self, key: str):
+        """
+        boto3/botocore failures (ClientError, connection and credential errors, failed
+        transfers) as StorageError, so callers only handle one exception type.
+        """
+        from boto3.exceptions import Boto3Error
+        from botocore.exceptions import BotoCoreError, ClientError
+
+        try:
+            yield
+        except ClientError as e:
+            if self._is_missing(e):
+                raise StorageObjectNotFound(f"Object not found: {key}") from e
+            raise StorageError(str(e)) from e
+        except (BotoCoreError, Boto3Error) as e:
+            raise StorageError(str(e)) from e
+
+    def exists(self, key: str) -> bool:
+        try:
+            with self._errors(key):
+                self._client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except StorageObjectNotFound:
+            return False
+
+    def put_file(self, local_path: Path, key: str, content_type: Optional[str] = None) -> None:
+        extra: Dict[str, str] = {"CacheControl": STORAGE_CACHE_CONTROL}
+        if content_type:
+            extra["ContentType"] = content_type
+        with self._errors(key):
+            self._client.upload_file(str(local_path), self.bucket, key, ExtraArgs=extra)
+
+    def get_file(self, key: str, local_path: Path) -> None:
+        with self._errors(key):
+            self._client.download_file(self.bucket, key, str(local_path))
+
+    def delete(self, key: str) -> None:
+        with self._errors(key):
+            self._client.delete_object(Bucket=self.bucket, Key=key)
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def presign_put(self, key: str, content_type: str, size: int, expires: int = STORAGE_PRESIGN_EXPIRES) -> str:
+        """
+        URL the client PUTs the file to. Content-Type and Content-Length are part of the
+        signature, so the bucket rejects any other type or size.
+        """
+        with self._errors(key):
+            return self._client.generate_presigned_url(
+                "put_object",
+                Params={"Bucket": self.bucket, "Key": key, "ContentType": content_type, "ContentLength": size},
+                ExpiresIn=expires,
+            )
+
+
+def build_storage():
+    if STORAGE_BACKEND == "s3" and S3_BUCKET:
+        try:
+            return S3Storage(S3_BUCKET)
+        except Exception as e:
+            print(f" S3 storage unavailable, using local storage: {e}")
+    return LocalStorage()
+
+
+storage = build_storage()
+
+
+def get_storage():
+    return storage
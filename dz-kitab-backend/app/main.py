@@ -16,7 +16,6 @@ if str(BASE_DIR) not in sys.path:
 # FastAPI Imports
 # ===============================
 from fastapi import FastAPI, Request, Response
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
@@ -40,8 +39,13 @@ from app.core.errors import (
 )
 from app.routers import (
     books, condition, ratings, notifications, auth,
-    wishlist, admin, recommendations, dashboard, messages, curriculum, users
+    wishlist, admin, recommendations, dashboard, messages, curriculum, users, upload
 )
+from app.services.view_counter import view_counter
+from app.core.http_clients import http_clients
+from app.core.storage import STORAGE_LOCAL_ROOT, STORAGE_LOCAL_BASE_URL
+from app.core.static_files import UploadsStaticFiles
+from app.services.image_variants import shutdown_process_pool
 
 # ===============================
 # CREATE FASTAPI APP
@@ -87,8 +91,25 @@ app.add_exception_handler(Exception, general_exception_handler)
 # ===============================
 # STATIC FILES
 # ===============================
-if Path("uploads").exists():
-    app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# Cache immuable pour les noms versionnes, ETag fort, Range, choix AVIF/WebP selon Accept
+if STORAGE_LOCAL_ROOT.exists():
+    app.mount(STORAGE_LOCAL_BASE_URL, UploadsStaticFiles(directory=STORAGE_LOCAL_ROOT), name="uploads")
+
+# ===============================
+# STARTUP / SHUTDOWN
+# ===============================
+@app.on_event("startup")
+async def start_background_jobs():
+    view_counter.start()
+    # Pooled keep-alive clients for OpenLibrary / Babelio / Google Books
+    await http_clients.open()
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    # Flush buffered announcement views before the worker exits
+    view_counter.stop()
+    await http_clients.aclose()
+    shutdown_process_pool()
 
 # ===============================
 # INCLUDE ROUTERS
@@ -105,6 +126,7 @@ app.include_router(recommendations.router, prefix="/api/recommendations", tags=[
 app.include_router(messages.router, prefix="/api/messages", tags=["Messages"])
 app.include_router(curriculum.router, prefix="/api/curriculum", tags=["Curriculum"])
 app.include_router(users.router, prefix="/api/public/users", tags=["Public Users"])
+app.include_router(upload.router, prefix="/api/images", tags=["Images"])
 
 # ===============================
 # ROOT & HEALTH ENDPOINTS
@@ -9,3 +9,5 @@ from app.models.user_suspension import UserSuspension, RatingAlert
 from app.models.wishlist import Wishlist
 from app.models.message import Message, Conversation, MessageStatus
 from app.models.curriculum import Curriculum, RecommendedBook, BookCurriculumMatch
+from app.models.isbn_cache import IsbnLookupCache
+from app.models.upload_blob import UploadBlob
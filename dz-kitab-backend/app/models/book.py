@@ -1,6 +1,6 @@
 # app/models/book.py
 
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Boolean, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Boolean, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -112,5 +112,13 @@ class Announcement(Base):
         cascade="all, delete-orphan"
     )
 
+    # Index composites pour les requetes des routers (voir migration d1f07fe12e79)
+    __table_args__ = (
+        Index("ix_announcements_status_category_created_at", "status", "category", "created_at"),
+        Index("ix_announcements_created_at_id", "created_at", "id"),
+        Index("ix_announcements_user_id_status", "user_id", "status"),
+        Index("ix_announcements_book_id", "book_id"),
+    )
+
     def __repr__(self):
         return f"<Announcement(id={self.id}, book_id={self.book_id}, price={self.price})>"
@@ -0,0 +1,19 @@
+# app/models/isbn_cache.py
+
+from sqlalchemy import Column, String, Text, Boolean, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class IsbnLookupCache(Base):
+    """Cache persistant des recherches ISBN (OpenLibrary / Babelio), positives et negatives"""
+    __tablename__ = "isbn_lookup_cache"
+
+    isbn = Column(String, primary_key=True)  # ISBN normalise (sans tirets ni espaces)
+    found = Column(Boolean, nullable=False, default=False)
+    payload = Column(Text, nullable=True)  # Reponse normalisee du fournisseur (JSON), NULL si introuvable
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f"<IsbnLookupCache(isbn={self.isbn}, found={self.found})>"
@@ -0,0 +1,22 @@
+# app/models/upload_blob.py
+
+from sqlalchemy import Column, String, Text, Integer, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class UploadBlob(Base):
+    """Image uploadee, stockee une seule fois par contenu recu (SHA-256) avec un compteur de references"""
+    __tablename__ = "upload_blobs"
+
+    digest = Column(String(64), primary_key=True)  # SHA-256 hexadecimal des octets recus (avant nettoyage)
+    filename = Column(String, unique=True, nullable=False)  # {digest}{ext} sous uploads/books
+    size = Column(Integer, nullable=False)  # Taille de l'original stocke (sans metadonnees)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    variants = Column(Text, nullable=True)  # Variantes WebP generees (JSON)
+    ref_count = Column(Integer, nullable=False, default=1)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<UploadBlob(digest={self.digest[:12]}, ref_count={self.ref_count})>"
@@ -1 +1,77 @@
+# app/pagination.py
 
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_, func, literal
+
+# SQLite keeps timestamps as text in mixed formats (CURRENT_TIMESTAMP has no
+# fractional part, bound datetimes do), so both sides are normalized before comparing.
+SQLITE_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%f"
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode a (created_at, id) keyset position as an opaque URL-safe token"""
+    payload = json.dumps({"c": created_at.isoformat(), "i": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a token produced by encode_cursor, raising 400 on anything malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return datetime.fromisoformat(payload["c"]), int(payload["i"])
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Curseur de pagination invalide"
+        )
+
+
+def _comparable(query, expression):
+    """Return an expression that orders and compares timestamps consistently on every backend"""
+    if query.session.get_bind().dialect.name == "sqlite":
+        return func.strftime(SQLITE_TIMESTAMP_FORMAT, expression)
+    return expression
+
+
+def apply_keyset(query, created_at_column, id_column, cursor: Optional[str]):
+    """
+    Order a query newest first on (created_at, id) and seek past the cursor position.
+
+    The seek predicate lets the database walk an index from the cursor instead of
+    scanning and discarding OFFSET rows, so page N costs the same as page 1.
+    """
+    sort_key = _comparable(query, created_at_column)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        position = _comparable(query, literal(created_at, type_=created_at_column.type))
+        query = query.filter(
+            or_(
+                sort_key < position,
+                and_(sort_key == position, id_column < row_id)
+            )
+        )
+    return query.order_by(sort_key.desc(), id_column.desc())
+
+
+def paginate_keyset(query, created_at_column, id_column, cursor: Optional[str], limit: int):
+    """
+    Fetch one keyset page.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    One extra row is fetched to know whether another page exists without a COUNT.
+    """
+    rows = apply_keyset(query, created_at_column, id_column, cursor).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, created_at_column.key), getattr(last, id_column.key))
+
+    return rows, next_cursor
@@ -11,6 +11,8 @@ from app.models.book import Announcement, Book
 from app.models.rating import Rating, SellerStats
 from app.middleware.auth import security
 from app.services.jwt import verify_token
+from app.core.cache import invalidate_catalog_cache
+from app.services.isbn_scraper import get_provider_health
 # Import dependency models for manual deletion
 from app.models.book_condition import BookConditionScore
 from app.models.rating import Rating
@@ -204,6 +206,20 @@ def get_sales_by_category(
             detail="Erreur lors de la rcupration des ventes par catgorie"
         )
 
+@router.get("/stats/isbn-providers")
+def get_isbn_provider_stats(
+    admin: User = Depends(get_current_admin)
+):
+    """
+    Health of the ISBN lookup providers (OpenLibrary, Google Books, Babelio)
+
+    Circuit breaker state, success rate and p50/p95 latency over the recent calls.
+    Figures are per worker process.
+    """
+    return {
+        "providers": get_provider_health()
+    }
+
 # ============================================
 # USER MANAGEMENT
 # ============================================
@@ -383,6 +399,7 @@ def delete_user(
         # Hard delete - remove from database
         db.delete(user)
         db.commit()
+        invalidate_catalog_cache()
         
         return {
             "message": f"Utilisateur {user.username} (ID: {user_id}) a t dfinitivement supprim de la base de donnes.",
@@ -494,6 +511,7 @@ def delete_announcement(
             
         db.delete(announcement)
         db.commit()
+        invalidate_catalog_cache()
         
         return {
             "message": "Annonce supprime avec succs",
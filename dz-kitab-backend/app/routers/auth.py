@@ -3,6 +3,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.database import get_db
+from app.core.cache import invalidate_catalog_cache
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin, UserResponse, TokenResponse, UserUpdate
 from app.middleware.auth import security
@@ -262,6 +263,8 @@ def update_profile(
     try:
         db.commit()
         db.refresh(user)
+        # Seller info is embedded in the cached catalog responses
+        invalidate_catalog_cache()
         return user
     except Exception as e:
         db.rollback()
@@ -1,8 +1,10 @@
 # app/routers/books.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, BackgroundTasks
+from fastapi.responses import StreamingResponse, FileResponse, RedirectResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 from app.database import get_db
 from app.models.book import Book, Announcement, BookCategoryEnum, BookConditionEnum, AnnouncementStatusEnum
 from app.models.user import User
@@ -11,14 +13,51 @@ from app.schemas.book import (
     AnnouncementUpdate,
     AnnouncementResponse,
     AnnouncementListResponse,
+    AnnouncementCardListResponse,
     ISBNLookupResponse,
+    ISBNBatchRequest,
+    ISBNBatchItem,
     GoogleBookInfo,
     BookResponse
 )
 from app.middleware.auth import security
 from app.services.jwt import verify_token
 
-from app.services.isbn_scraper import fetch_book_by_isbn_scraping
+from app.services.isbn_cache import (
+    lookup_book_info,
+    lookup_book_infos,
+    local_book_info,
+    normalize_isbn,
+    ISBN_BATCH_MAX_SIZE
+)
+from app.services.book_enrichment import enrich_book
+from app.services.announcement_loader import (
+    format_announcements,
+    format_announcement_cards,
+    card_columns_only,
+    load_books_and_sellers,
+    build_announcement_response
+)
+from app.core.cache import (
+    cached_response,
+    invalidate_catalog_cache,
+    ANNOUNCEMENTS_NAMESPACE,
+    CATEGORIES_NAMESPACE
+)
+from app.pagination import paginate_keyset
+from app.core.conditional import announcement_validators, collection_validators
+from app.services.view_counter import view_counter
+from app.services.cover_cache import (
+    cover_cache,
+    cover_path,
+    is_proxied,
+    is_cover_proxy_url,
+    COVER_WIDTHS,
+    COVER_DETAIL_WIDTH,
+    COVER_CACHE_CONTROL
+)
+from app.services.facets import compute_facets, parse_price_ranges
+from app.services.search import apply_book_search, apply_fuzzy_book_search, trigram_index
 
 router = APIRouter()
 
@@ -53,7 +92,12 @@ def get_categories():
     """
     Obtenir la liste de toutes les catgories disponibles
     """
-    return [category.value for category in BookCategoryEnum]
+    return cached_response(
+        CATEGORIES_NAMESPACE,
+        {},
+        lambda: [category.value for category in BookCategoryEnum],
+        ttl=3600
+    )
 
 
 # ============================================
@@ -90,17 +134,17 @@ async def test_isbn_lookup():
 
 
 @router.get("/isbn/{isbn}", response_model=ISBNLookupResponse)
-async def lookup_isbn(isbn: str):
+async def lookup_isbn(isbn: str, db: Session = Depends(get_db)):
     """
     Lookup book information by ISBN using Google Books API
     
     This endpoint is used to auto-fill the book form when creating an announcement.
     The user enters the ISBN, and this endpoint returns all book details including cover image.
+    Known books and cached lookups (found or not) are answered without any network call.
     """
     try:
-        # Fetch book info from Google Books
-        # Fetch book info using Web Scraping (as requested by user)
-        book_info = await fetch_book_by_isbn_scraping(isbn)
+        # Fetch book info: books table, ISBN cache, then Web Scraping
+        book_info = await lookup_book_info(db, isbn)
         
 
         
@@ -125,6 +169,61 @@ async def lookup_isbn(isbn: str):
         )
 
 
+@router.post("/isbn/batch")
+async def lookup_isbn_batch(batch: ISBNBatchRequest, db: Session = Depends(get_db)):
+    """
+    Lookup many ISBNs at once (e.g. a whole semester's book list)
+    
+    Known books and cached lookups are answered first, the rest with multi-ISBN OpenLibrary
+    calls and, only where needed, individual provider lookups.
+    Results are streamed as NDJSON (one ISBNBatchItem per line) in the order they resolve.
+    """
+    if len(batch.isbns) > ISBN_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Maximum {ISBN_BATCH_MAX_SIZE} ISBN par requete"
+        )
+    
+    async def stream_results():
+        async for isbn, book_info in lookup_book_infos(db, batch.isbns):
+            item = ISBNBatchItem(
+                isbn=isbn,
+                found=book_info is not None,
+                book_info=GoogleBookInfo(**book_info) if book_info else None
+            )
+            yield item.model_dump_json() + "\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+# ============================================
+# COVER THUMBNAILS
+# ============================================
+
+@router.get("/covers/{book_id}/{width}.webp")
+async def get_book_cover(book_id: int, width: int, db: Session = Depends(get_db)):
+    """
+    Local WebP thumbnail of a book's remote cover (URLs come from the cover_thumbnail_url of responses)
+    
+    Thumbnails are immutable (versioned by ?v=) and cached for a year by browsers.
+    On a miss the cover is fetched in the background and the client is redirected
+    to the remote image meanwhile.
+    """
+    book = db.query(Book.cover_image_url).filter(Book.id == book_id).first()
+    if not book or not is_proxied(book.cover_image_url) or width not in COVER_WIDTHS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Couverture non trouvee"
+        )
+    
+    path = cover_path(book_id, book.cover_image_url, width)
+    if path.exists():
+        return FileResponse(path, media_type="image/webp", headers={"Cache-Control": COVER_CACHE_CONTROL})
+    
+    cover_cache.schedule(book_id, book.cover_image_url)
+    return RedirectResponse(book.cover_image_url, status_code=status.HTTP_307_TEMPORARY_REDIRECT, headers={"Cache-Control": "no-store"})
+
+
 # ============================================
 # CREATE ANNOUNCEMENT
 # ============================================
@@ -132,6 +231,7 @@ async def lookup_isbn(isbn: str):
 @router.post("/announcements", response_model=AnnouncementResponse, status_code=status.HTTP_201_CREATED)
 async def create_announcement(
     announcement_data: AnnouncementCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     user_id: int = Depends(get_current_user_id)
 ):
@@ -139,22 +239,31 @@ async def create_announcement(
     Create a new book announcement with category, page count and publication date
     
     This endpoint:
-    1. Fetches book info from Google Books API using the ISBN
-    2. Creates or retrieves the book in the database
+    1. Retrieves the book from the database, or fetches its info by ISBN (cached lookup)
+    2. Creates the book in the database if needed
     3. Creates the announcement with category, page count, publication date
+    
+    When the ISBN is not cached and the seller provided the title, the book is created
+    from the seller's fields and enriched (cover, pages, publisher...) in the background,
+    so the response does not wait for the book providers.
     """
     try:
         print(f" Creating announcement for ISBN: {announcement_data.isbn}")
         print(f" Data: {announcement_data.dict(exclude={'custom_images'})}")
         
-        # 1. Fetch book info from Web Scraping
-        book_info = await fetch_book_by_isbn_scraping(announcement_data.isbn)
-        
-        # 2. Check if book already exists in database
-        isbn_to_use = announcement_data.isbn.replace("-", "").replace(" ", "")
+        # 1. Check if book already exists in database (no external lookup then)
+        isbn_to_use = normalize_isbn(announcement_data.isbn)
         book = db.query(Book).filter(Book.isbn == isbn_to_use).first()
         
+        enrich_later = False
         if not book:
+            # 2. Book info from the ISBN cache; if unknown and the seller typed the title,
+            #    create the book right away and fetch the rest in the background
+            answered, book_info = local_book_info(db, isbn_to_use)
+            enrich_later = not answered and bool(announcement_data.title)
+            if not answered and not enrich_later:
+                # Nothing to create the book from: wait for the providers (Web Scraping)
+                book_info = await lookup_book_info(db, isbn_to_use)
             if not book_info:
                 # If not found on Google Books, we must have manual title and authors
                 if not announcement_data.title:
@@ -172,7 +281,8 @@ async def create_announcement(
                     published_date=announcement_data.publication_date,
                     description=announcement_data.description,
                     page_count=announcement_data.page_count,
-                    cover_image_url=announcement_data.cover_image_url,
+                    # A thumbnail URL of this API is not a cover: never store it
+                    cover_image_url=None if is_cover_proxy_url(announcement_data.cover_image_url) else announcement_data.cover_image_url,
                 )
             else:
                 # Create new book entry with info from Google Books
@@ -194,6 +304,8 @@ async def create_announcement(
             db.add(book)
             db.commit()
             db.refresh(book)
+            if enrich_later:
+                background_tasks.add_task(enrich_book, book.id)
         
         # 3. Use page_count and publication_date from user input or fallback to book data
         page_count = announcement_data.page_count or book.page_count
@@ -223,6 +335,7 @@ async def create_announcement(
         db.add(announcement)
         db.commit()
         db.refresh(announcement)
+        invalidate_catalog_cache()
 
         # 5. Prepare response with nested data
         user = db.query(User).filter(User.id == user_id).first()
@@ -290,14 +403,23 @@ async def create_announcement(
 # GET ANNOUNCEMENTS
 # ============================================
 
-@router.get("/announcements", response_model=AnnouncementListResponse)
+@router.get("/announcements", response_model=Union[AnnouncementListResponse, AnnouncementCardListResponse])
 def get_announcements(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     status: Optional[str] = None,
     condition: Optional[str] = None,
     category: Optional[str] = None,
     search: Optional[str] = None,
+    fuzzy: bool = Query(False, description="Recherche tolerante aux fautes de frappe (trigrammes)"),
+    min_similarity: float = Query(0.3, ge=0.1, le=1.0, description="Seuil de similarite en mode fuzzy"),
+    facets: bool = Query(False, description="Inclure les compteurs par categorie, etat et tranche de prix"),
+    price_ranges: Optional[str] = Query(None, description="Tranches de prix des facettes, ex: 0-1000,1000-3000,3000-"),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$", description="offset (skip/limit) ou cursor (keyset)"),
+    cursor: Optional[str] = Query(None, description="Valeur next_cursor de la page precedente"),
+    with_total: Optional[bool] = Query(None, description="Calculer le total exact (par defaut: oui en mode offset, non en mode cursor)"),
+    fields: str = Query("full", pattern="^(full|card)$", description="full ou card (titre, couverture, prix, etat, vendeur)"),
     db: Session = Depends(get_db)
 ):
     """
@@ -307,9 +429,22 @@ def get_announcements(
     - status: Filter by announcement status
     - condition: Filter by book condition
     - category: Filter by book category
-    - search: Search by title, author, or ISBN
+    - search: Full-text search on title, author, or ISBN (ranked by relevance in offset mode)
+    - fuzzy: Match misspelled titles/authors by trigram similarity (>= min_similarity)
+    - facets: Also return counts per category, condition and price range (price_ranges)
+    
+    Pagination:
+    - offset (default): skip/limit, kept for backward compatibility
+    - cursor: newest first, keyed on (created_at, id). Pass the returned
+      next_cursor to get the following page; next_cursor is null on the last page.
+    
+    Projection:
+    - fields=card returns slim cards (title, cover, price, condition, seller name)
+      and only selects those columns.
+    
+    Responses carry a weak ETag (no Last-Modified for lists); send If-None-Match to get 304.
     """
-    try:
+    def build_listing():
         query = db.query(Announcement)
         
         # Apply filters
@@ -320,60 +455,80 @@ def get_announcements(
         if category:
             query = query.filter(Announcement.category == category)
             
-        # Apply Search Filter (Search in Book title/author/isbn)
-        if search:
-            search_pattern = f"%{search}%"
-            query = query.join(Book).filter(
-                (Book.title.like(search_pattern)) |
-                (Book.authors.like(search_pattern)) |
-                (Book.isbn.like(search_pattern))
-            )
+        # Apply Search Filter (full-text index on Book title/author/isbn)
+        rank_order = None
+        if search and fuzzy:
+            query, rank_order = apply_fuzzy_book_search(query, db, search, min_similarity)
+        elif search:
+            query, rank_order = apply_book_search(query, db, search)
+        
+        # Facet counts over the filtered set (one GROUP BY query)
+        facet_counts = None
+        if facets:
+            facet_counts = compute_facets(query, parse_price_ranges(price_ranges))
+        
+        use_cursor = pagination == "cursor" or cursor is not None
+        include_total = with_total if with_total is not None else not use_cursor
         
-        # Get total count
-        total = query.count()
+        # Get total count (optional: it scans the whole filtered set)
+        total = query.count() if include_total else None
+        
+        if fields == "card":
+            query = query.options(card_columns_only())
         
         # Get paginated results
-        announcements = query.offset(skip).limit(limit).all()
+        next_cursor = None
+        if use_cursor:
+            announcements, next_cursor = paginate_keyset(
+                query, Announcement.created_at, Announcement.id, cursor, limit
+            )
+        else:
+            if rank_order is not None:
+                # Most relevant first when searching
+                query = query.order_by(rank_order, Announcement.id.desc())
+            announcements = query.offset(skip).limit(limit).all()
         
-        # Format response
-        formatted_announcements = []
-        for ann in announcements:
-            book = db.query(Book).filter(Book.id == ann.book_id).first()
-            user = db.query(User).filter(User.id == ann.user_id).first()
-            
-            formatted_announcements.append(
-                AnnouncementResponse(
-                    id=ann.id,
-                    book_id=ann.book_id,
-                    user_id=ann.user_id,
-                    category=ann.category.value,
-                    price=ann.price,
-                    market_price=ann.market_price,
-                    final_calculated_price=ann.final_calculated_price,
-                    condition=ann.condition.value,
-                    status=ann.status.value,
-                    description=ann.description,
-                    custom_images=ann.custom_images,
-                    location=ann.location,
-                    page_count=ann.page_count,
-                    publication_date=ann.publication_date,
-                    views_count=ann.views_count,
-                    created_at=ann.created_at,
-                    updated_at=ann.updated_at,
-                    book=book,
-                    user={
-                        "id": user.id,
-                        "username": user.username,
-                        "email": user.email
-                    }
-                )
+        if fields == "card":
+            return AnnouncementCardListResponse(
+                total=total,
+                announcements=format_announcement_cards(db, announcements),
+                next_cursor=next_cursor,
+                facets=facet_counts
             )
         
+        # Format response (books and sellers batch-loaded for the whole page)
+        formatted_announcements = format_announcements(db, announcements)
+        
         return AnnouncementListResponse(
             total=total,
-            announcements=formatted_announcements
+            announcements=formatted_announcements,
+            next_cursor=next_cursor,
+            facets=facet_counts
         )
         
+    try:
+        params = {
+            "endpoint": "list", "skip": skip, "limit": limit, "status": status, "condition": condition,
+            "category": category, "search": search, "fuzzy": fuzzy,
+            "min_similarity": min_similarity, "facets": facets, "price_ranges": price_ranges,
+            "pagination": pagination, "cursor": cursor, "with_total": with_total,
+            "fields": fields
+        }
+        return cached_response(
+            ANNOUNCEMENTS_NAMESPACE,
+            params,
+            build_listing,
+            request=request,
+            validators=lambda content: collection_validators(
+                content["announcements"],
+                content.get("total"),
+                content.get("next_cursor"),
+                content.get("facets")
+            )
+        )
+        
+    except HTTPException:
+        raise
     except Exception as e:
         print(f" Error fetching announcements: {e}")
         raise HTTPException(
@@ -383,48 +538,42 @@ def get_announcements(
 
 
 @router.get("/announcements/{announcement_id}", response_model=AnnouncementResponse)
-def get_announcement(announcement_id: int, db: Session = Depends(get_db)):
-    """Get a specific announcement by ID"""
-    announcement = db.query(Announcement).filter(Announcement.id == announcement_id).first()
-    
-    if not announcement:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Annonce non trouve"
+def get_announcement(announcement_id: int, request: Request, db: Session = Depends(get_db)):
+    """Get a specific announcement by ID (supports If-None-Match / If-Modified-Since)"""
+    def build_detail():
+        announcement = db.query(Announcement).filter(Announcement.id == announcement_id).first()
+        
+        if not announcement:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Annonce non trouve"
+            )
+        
+        books, users = load_books_and_sellers(db, [announcement])
+        return build_announcement_response(
+            announcement,
+            books[announcement.book_id],
+            users[announcement.user_id],
+            cover_width=COVER_DETAIL_WIDTH
         )
     
-    # Increment view count
-    announcement.views_count += 1
-    db.commit()
-    
-    book = db.query(Book).filter(Book.id == announcement.book_id).first()
-    user = db.query(User).filter(User.id == announcement.user_id).first()
+    def with_buffered_views(content):
+        # Views not yet flushed to the database (and this one) are added on top of the stored count
+        return {**content, "views_count": content["views_count"] + view_counter.pending(announcement_id) + 1}
     
-    return AnnouncementResponse(
-        id=announcement.id,
-        book_id=announcement.book_id,
-        user_id=announcement.user_id,
-        category=announcement.category.value,
-        price=announcement.price,
-        market_price=announcement.market_price,
-        final_calculated_price=announcement.final_calculated_price,
-        condition=announcement.condition.value,
-        status=announcement.status.value,
-        description=announcement.description,
-        custom_images=announcement.custom_images,
-        location=announcement.location,
-        page_count=announcement.page_count,
-        publication_date=announcement.publication_date,
-        views_count=announcement.views_count,
-        created_at=announcement.created_at,
-        updated_at=announcement.updated_at,
-        book=book,
-        user={
-            "id": user.id,
-            "username": user.username,
-            "email": user.email
-        }
+    response = cached_response(
+        ANNOUNCEMENTS_NAMESPACE,
+        {"endpoint": "detail", "id": announcement_id},
+        build_detail,
+        postprocess=with_buffered_views,
+        request=request,
+        validators=announcement_validators
     )
+    
+    # Increment view count (buffered, written in batches by view_counter)
+    view_counter.record(announcement_id)
+    
+    return response
 
 
 # ============================================
@@ -439,38 +588,7 @@ def get_my_announcements(
     """Get all announcements created by the current user (protected route)"""
     announcements = db.query(Announcement).filter(Announcement.user_id == user_id).all()
     
-    formatted_announcements = []
-    for ann in announcements:
-        book = db.query(Book).filter(Book.id == ann.book_id).first()
-        user = db.query(User).filter(User.id == ann.user_id).first()
-        
-        formatted_announcements.append(
-            AnnouncementResponse(
-                id=ann.id,
-                book_id=ann.book_id,
-                user_id=ann.user_id,
-                category=ann.category.value,
-                price=ann.price,
-                market_price=ann.market_price,
-                final_calculated_price=ann.final_calculated_price,
-                condition=ann.condition.value,
-                status=ann.status.value,
-                description=ann.description,
-                custom_images=ann.custom_images,
-                location=ann.location,
-                page_count=ann.page_count,
-                publication_date=ann.publication_date,
-                views_count=ann.views_count,
-                created_at=ann.created_at,
-                updated_at=ann.updated_at,
-                book=book,
-                user={
-                    "id": user.id,
-                    "username": user.username,
-                    "email": user.email
-                }
-            )
-        )
+    formatted_announcements = format_announcements(db, announcements)
     
     return AnnouncementListResponse(total=len(formatted_announcements),
     announcements=formatted_announcements
@@ -532,12 +650,20 @@ def update_announcement(
             book.authors = update_data.authors
         if update_data.publisher is not None:
             book.publisher = update_data.publisher
-        if update_data.cover_image_url is not None:
+        # Clients may send back the thumbnail URL they were given: keep the stored remote cover
+        if update_data.cover_image_url is not None and not is_cover_proxy_url(update_data.cover_image_url):
             book.cover_image_url = update_data.cover_image_url
+        if db.is_modified(book):
+            # Book edits change the announcement body: bump updated_at so ETags change too
+            announcement.updated_at = func.now()
             
     db.commit()
     db.refresh(announcement)
     
+    if update_data.title is not None or update_data.authors is not None:
+        trigram_index.invalidate()
+    invalidate_catalog_cache()
+    
     book = db.query(Book).filter(Book.id == announcement.book_id).first()
     user = db.query(User).filter(User.id == announcement.user_id).first()
     
@@ -594,6 +720,7 @@ def delete_announcement(
     try:
         db.delete(announcement)
         db.commit()
+        invalidate_catalog_cache()
         
         return {
             "message": "Annonce supprime avec succs",
@@ -14,6 +14,7 @@ from app.schemas.condition import (
 )
 from app.middleware.auth import security
 from app.services.jwt import verify_token
+from app.core.cache import invalidate_catalog_cache
 from app.models.user import User
 
 router = APIRouter()
@@ -135,6 +136,7 @@ def evaluate_book_condition(
     db.commit()
     db.refresh(condition_score)
     db.refresh(announcement)
+    invalidate_catalog_cache()
     
     # Calculer le multiplicateur pour la rponse
     multiplier = None
@@ -16,6 +16,7 @@ from app.services.curriculum_service import (
     auto_match_all_books
 )
 from app.middleware.auth import security
+from app.core.cache import cached_response, response_cache, CURRICULUMS_NAMESPACE
 from app.services.jwt import verify_token
 
 router = APIRouter()
@@ -74,7 +75,7 @@ def get_curriculums(
     - university: Filtrer par universit (ex: "USTHB")
     - field: Filtrer par filire (ex: "Informatique")
     """
-    try:
+    def build_curriculums():
         query = db.query(Curriculum)
         
         if university:
@@ -104,6 +105,13 @@ def get_curriculums(
             "curriculums": result
         }
         
+    try:
+        return cached_response(
+            CURRICULUMS_NAMESPACE,
+            {"skip": skip, "limit": limit, "university": university, "field": field},
+            build_curriculums
+        )
+        
     except Exception as e:
         print(f" Erreur rcupration cursus: {e}")
         raise HTTPException(
@@ -363,6 +371,7 @@ def trigger_book_matching(
         
         # Lancer le matching
         auto_match_all_books(db)
+        response_cache.invalidate(CURRICULUMS_NAMESPACE)
         
         return {
             "message": "Matching termin avec succs",
@@ -14,6 +14,7 @@ from app.models.notification import Notification
 from app.models.wishlist import Wishlist
 from app.middleware.auth import security
 from app.services.jwt import verify_token
+from app.services.view_counter import view_counter
 
 router = APIRouter()
 
@@ -248,6 +249,9 @@ def get_popular_listings(
     try:
         from app.models.book import Book
         
+        # Write this worker's buffered views first so the ranking is up to date
+        view_counter.flush()
+        
         popular_listings = db.query(
             Announcement,
             Book
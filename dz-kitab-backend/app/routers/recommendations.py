@@ -1,46 +1,32 @@
 # app/routers/recommendations.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.book import Announcement, Book
 from app.models.user import User
 from app.schemas.book import AnnouncementResponse
+from app.core.cache import cached_response, RECOMMENDATIONS_NAMESPACE
+from app.core.conditional import collection_validators
+from app.services.announcement_loader import (
+    load_books_and_sellers,
+    build_announcement_response,
+    format_announcements
+)
 
 router = APIRouter()
 
 def format_announcement_response(announcement: Announcement, db: Session) -> AnnouncementResponse:
     """Helper pour formater une annonce en rponse"""
-    book = db.query(Book).filter(Book.id == announcement.book_id).first()
-    user = db.query(User).filter(User.id == announcement.user_id).first()
-    
-    return AnnouncementResponse(
-        id=announcement.id,
-        book_id=announcement.book_id,
-        user_id=announcement.user_id,
-        category=announcement.category.value if hasattr(announcement.category, 'value') else announcement.category,
-        price=announcement.price,
-        market_price=announcement.market_price,
-        final_calculated_price=announcement.final_calculated_price,
-        condition=announcement.condition.value if hasattr(announcement.condition, 'value') else announcement.condition,
-        status=announcement.status.value if hasattr(announcement.status, 'value') else announcement.status,
-        description=announcement.description,
-        custom_images=announcement.custom_images,
-        location=announcement.location,
-        page_count=announcement.page_count,
-        publication_date=announcement.publication_date,
-        views_count=announcement.views_count or 0,
-        created_at=announcement.created_at,
-        updated_at=announcement.updated_at,
-        book=book,
-        user={
-            "id": user.id,
-            "username": user.username,
-            "email": user.email
-        }
+    books, users = load_books_and_sellers(db, [announcement])
+    return build_announcement_response(
+        announcement,
+        books[announcement.book_id],
+        users[announcement.user_id]
     )
 
 @router.get("/announcements/{announcement_id}")
 def get_same_domain_recommendations(
+    request: Request,
     announcement_id: int,
     limit: int = Query(4, ge=1, le=12, description="Nombre de recommandations"),
     db: Session = Depends(get_db)
@@ -56,7 +42,7 @@ def get_same_domain_recommendations(
     
     **Retourne**: Liste de livres de la mme catgorie
     """
-    try:
+    def build_recommendations():
         # 1. Rcuprer l'annonce actuelle
         current_announcement = db.query(Announcement).filter(
             Announcement.id == announcement_id
@@ -83,10 +69,7 @@ def get_same_domain_recommendations(
         ).limit(limit).all()
         
         # 4. Formater les rponses
-        formatted_recommendations = [
-            format_announcement_response(ann, db)
-            for ann in recommendations
-        ]
+        formatted_recommendations = format_announcements(db, recommendations)
         
         # 5. Retourner les recommandations
         return {
@@ -97,6 +80,19 @@ def get_same_domain_recommendations(
             "recommendations": formatted_recommendations
         }
         
+    try:
+        return cached_response(
+            RECOMMENDATIONS_NAMESPACE,
+            {"announcement_id": announcement_id, "limit": limit},
+            build_recommendations,
+            request=request,
+            validators=lambda content: collection_validators(
+                content["recommendations"],
+                content["announcement_id"],
+                content["category"]
+            )
+        )
+        
     except HTTPException:
         raise
     except Exception as e:
@@ -1,38 +1,76 @@
 # app/routers/upload.py
 
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, status
-from typing import List
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
 import os
+import re
 import uuid
-from pathlib import Path
 import shutil
-from io import BytesIO
-from PIL import Image
+import hashlib
+import tempfile
+from pathlib import Path
 
+from app.database import get_db
 from app.middleware.auth import security
+from app.core.storage import STORAGE_PRESIGN_EXPIRES, StorageError, StorageObjectNotFound, get_storage
+from app.schemas.upload import PresignedUploadRequest, PresignedUploadResponse, CompleteUploadRequest
+from app.services.upload_blobs import (
+    upload_processing,
+    acquire_existing_blob,
+    acquire_blob,
+    release_blob,
+)
+from app.services.image_variants import (
+    UPLOAD_VARIANT_WIDTHS,
+    UPLOAD_THUMBNAIL_WIDTH,
+    process_upload,
+    sanitize_upload,
+    variant_filename,
+)
 
 router = APIRouter()
 
 # Configuration
-UPLOAD_DIR = Path("uploads/books")
+# Prefixes des cles de stockage : images publiees, et uploads directs pas encore confirmes
+# (a expirer cote bucket avec une regle de cycle de vie sur "incoming/")
+UPLOAD_PREFIX = "books"
+INCOMING_PREFIX = "incoming"
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
 ALLOWED_IMAGE_FORMATS = {"jpeg", "png", "webp", "gif"}
+# Extension des fichiers stockes, d'apres le format reel (et non le nom envoye)
+FORMAT_EXTENSIONS = {"jpeg": ".jpg", "png": ".png", "webp": ".webp", "gif": ".gif"}
+FORMAT_MIME_TYPES = {"jpeg": "image/jpeg", "png": "image/png", "webp": "image/webp", "gif": "image/gif"}
 ALLOWED_MIME_TYPES = {"image/jpeg", "image/png", "image/webp", "image/gif"}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5 MB
 MIN_FILE_SIZE = 1024  # 1 KB
 MAX_FILES_PER_UPLOAD = 5
+UPLOAD_CHUNK_SIZE = 64 * 1024  # 64 KB
+
+INCOMING_KEY_PATTERN = re.compile(rf"^{INCOMING_PREFIX}/[0-9a-f-]{{36}}\.[a-z]+$")
 
-# Removed top-level mkdir to prevent crash on Vercel (read-only filesystem)
-# UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+def sniff_image_format(header: bytes) -> Optional[str]:
+    """Image format from the file signature (magic bytes), without decoding the image"""
+    if header.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
 
-def validate_image_file(file: UploadFile) -> None:
+
+def validate_image_file(filename: Optional[str], content_type: Optional[str]) -> None:
     """
-    Validate uploaded image using Pillow (Python 3.12+ safe)
+    Cheap checks done before reading the content: extension and declared MIME type
     """
 
     # Extension check
-    file_ext = os.path.splitext(file.filename)[1].lower()
+    file_ext = os.path.splitext(filename or "")[1].lower()
     if file_ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -40,78 +78,275 @@ def validate_image_file(file: UploadFile) -> None:
         )
 
     # MIME type check
-    if file.content_type not in ALLOWED_MIME_TYPES:
+    if content_type not in ALLOWED_MIME_TYPES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Type MIME non autoris"
         )
 
-    # File size check
-    file.file.seek(0, os.SEEK_END)
-    file_size = file.file.tell()
-    file.file.seek(0)
 
-    if file_size < MIN_FILE_SIZE:
+def validate_image_header(header: bytes) -> str:
+    """Real image validation (content-based), from the first bytes only"""
+    image_format = sniff_image_format(header[:16])
+    if image_format is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Fichier trop petit"
+            detail="Le fichier n'est pas une image valide"
         )
-
-    if file_size > MAX_FILE_SIZE:
+    if image_format not in ALLOWED_IMAGE_FORMATS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Fichier trop volumineux"
+            detail="Format dimage non support"
         )
+    return image_format
 
-    # Real image validation (content-based)
-    try:
-        image = Image.open(BytesIO(file.file.read()))
-        image_format = image.format.lower()
-        file.file.seek(0)
-    except Exception:
+
+def validate_image_size(size: int) -> None:
+    if size > MAX_FILE_SIZE:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Le fichier n'est pas une image valide"
+            detail="Fichier trop volumineux"
         )
-
-    if image_format not in ALLOWED_IMAGE_FORMATS:
+    if size < MIN_FILE_SIZE:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Format dimage non support"
+            detail="Fichier trop petit"
         )
 
 
+# ============================================
+# LOCAL WORK FILES
+# ============================================
+
+def _open_work_file():
+    """Private temp directory of one upload (system temp dir, also writable on Vercel)"""
+    work_dir = Path(tempfile.mkdtemp(prefix="dzkitab-upload-"))
+    return work_dir, open(work_dir / "upload.part", "wb")
+
+
+def _write_chunk(temp_file, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    temp_file.write(chunk)
+
+
+def _hash_file(path: Path) -> Tuple[str, int, bytes]:
+    """(sha256, size, first bytes) of a local file"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        header = f.read(16)
+        f.seek(0)
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size, header
+
+
+def _name_by_content(source: Path, content_hash: str, image_format: str) -> Path:
+    path = source.with_name(f"{content_hash}{FORMAT_EXTENSIONS[image_format]}")
+    os.replace(source, path)
+    return path
+
+
+def _cleanup(work_dir: Path) -> None:
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _storage_unavailable(action: str, error: StorageError) -> HTTPException:
+    print(f" Storage error ({action}): {error}")
+    return HTTPException(status_code=503, detail="Stockage des images indisponible")
+
+
+def _delete_incoming(key: str) -> None:
+    """Best-effort removal of a presigned upload object (the bucket lifecycle rule is the fallback)"""
+    try:
+        get_storage().delete(key)
+    except StorageError as e:
+        print(f" Error deleting incoming upload {key}: {e}")
+
+
+async def receive_image_upload(file: UploadFile) -> dict:
+    """
+    Validate an uploaded image and copy it, chunk by chunk, to a local work file named
+    by the SHA-256 of the received bytes.
+
+    The content is copied in UPLOAD_CHUNK_SIZE chunks, hashed and size-checked while
+    copying, and the format is checked from the signature of the first chunk (no full
+    decode). Disk I/O runs in the threadpool, so concurrent uploads do not block the
+    event loop. The work directory is removed by store_image_upload.
+    """
+    validate_image_file(file.filename, file.content_type)
+
+    first_chunk = await file.read(UPLOAD_CHUNK_SIZE)
+    image_format = validate_image_header(first_chunk)
+
+    work_dir, temp_file = await run_in_threadpool(_open_work_file)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        chunk = first_chunk
+        while chunk:
+            size += len(chunk)
+            if size > MAX_FILE_SIZE:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Fichier trop volumineux"
+                )
+            await run_in_threadpool(_write_chunk, temp_file, digest, chunk)
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        await run_in_threadpool(temp_file.close)
+        validate_image_size(size)
+
+        content_hash = digest.hexdigest()
+        path = await run_in_threadpool(_name_by_content, Path(temp_file.name), content_hash, image_format)
+    except BaseException:
+        await run_in_threadpool(temp_file.close)
+        await run_in_threadpool(_cleanup, work_dir)
+        raise
+
+    return {"work_dir": work_dir, "path": path, "format": image_format, "size": size, "sha256": content_hash}
+
+
+# ============================================
+# STORAGE
+# ============================================
+
+def _publish(path: Path, image_format: str, processed: dict) -> None:
+    """Copy the variants, then the original, to the storage backend"""
+    storage = get_storage()
+    for variant in processed["variants"]:
+        storage.put_file(path.with_name(variant["filename"]), f"{UPLOAD_PREFIX}/{variant['filename']}", "image/webp")
+        if variant.get("avif_filename"):
+            storage.put_file(path.with_name(variant["avif_filename"]), f"{UPLOAD_PREFIX}/{variant['avif_filename']}", "image/avif")
+    for sibling in processed.get("siblings", []):
+        storage.put_file(path.with_name(sibling), f"{UPLOAD_PREFIX}/{sibling}", "image/avif" if sibling.endswith(".avif") else "image/webp")
+    # Original last: once it is stored, the whole set is
+    storage.put_file(path, f"{UPLOAD_PREFIX}/{path.name}", FORMAT_MIME_TYPES[image_format])
+
+
+async def _process_and_publish(received: dict) -> dict:
+    """
+    Shared processing task: metadata stripping of the original, variants, then upload.
+    It owns the work files, so it removes them itself.
+    """
+    try:
+        await sanitize_upload(received["path"], received["format"])
+        processed = await process_upload(received["path"])
+        processed["size"] = (await run_in_threadpool(os.stat, received["path"])).st_size
+        await run_in_threadpool(_publish, received["path"], received["format"], processed)
+        return processed
+    finally:
+        await run_in_threadpool(_cleanup, received["work_dir"])
+
+
+def image_response(filename: str, size: int, processed: dict) -> dict:
+    storage = get_storage()
+    url = storage.url(f"{UPLOAD_PREFIX}/{filename}")
+    variants = {
+        str(variant["width"]): storage.url(f"{UPLOAD_PREFIX}/{variant['filename']}")
+        for variant in processed["variants"]
+    }
+    return {
+        "filename": filename,
+        "url": url,
+        "size": size,
+        "width": processed["width"],
+        "height": processed["height"],
+        "variants": variants,
+        "thumbnail_url": variants.get(str(UPLOAD_THUMBNAIL_WIDTH), url)
+    }
+
+
+async def store_image_upload(received: dict, db: Session) -> dict:
+    """
+    Processing stage after receive_image_upload: metadata stripping of the original,
+    WebP variants of the photo and its dimensions, then upload of the whole set to the
+    storage backend.
+
+    Uploads are deduplicated on the SHA-256 of the received bytes, before any decoding:
+    content that is already stored skips the processing and the upload (its variants
+    are reused) and only gains a reference. The local work files are always removed:
+    here, or by the shared processing task once they are handed to it (other uploads of
+    the same content wait on that task, even if this request is cancelled).
+    """
+    filename = received["path"].name
+    handed_off = False
+
+    def start_processing():
+        nonlocal handed_off
+        handed_off = True
+        return _process_and_publish(received)
+
+    try:
+        # The reference is taken first: the files cannot be deleted while it is held
+        processed = await run_in_threadpool(acquire_existing_blob, db, received["sha256"])
+        referenced = processed is not None
+
+        try:
+            try:
+                published = referenced and await run_in_threadpool(get_storage().exists, f"{UPLOAD_PREFIX}/{filename}")
+            except StorageError as e:
+                raise _storage_unavailable(f"checking {filename}", e)
+
+            if not published:
+                try:
+                    processed, _ = await upload_processing.do(received["sha256"], start_processing)
+                except StorageError as e:
+                    raise _storage_unavailable(f"storing {filename}", e)
+                except Exception as e:
+                    print(f" Error processing upload {filename}: {e}")
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Le fichier n'est pas une image valide"
+                    )
+        except BaseException:
+            if referenced:
+                await run_in_threadpool(release_blob, db, filename, _delete_with_variants)
+            raise
+
+        if not referenced:
+            await run_in_threadpool(acquire_blob, db, received["sha256"], filename, processed)
+    finally:
+        if not handed_off:
+            await run_in_threadpool(_cleanup, received["work_dir"])
+
+    return image_response(filename, processed["size"], processed)
+
+
+def _delete_with_variants(filename: str) -> None:
+    storage = get_storage()
+    stem = os.path.splitext(filename)[0]
+    storage.delete(f"{UPLOAD_PREFIX}/{filename}")
+    for ext in (".webp", ".avif"):
+        storage.delete(f"{UPLOAD_PREFIX}/{stem}{ext}")
+    for width in UPLOAD_VARIANT_WIDTHS:
+        storage.delete(f"{UPLOAD_PREFIX}/{variant_filename(stem, width)}")
+        storage.delete(f"{UPLOAD_PREFIX}/{variant_filename(stem, width, '.avif')}")
+
+
 def sanitize_filename(filename: str) -> str:
-    import re
     return re.sub(r"[^a-zA-Z0-9._-]", "_", filename)
 
 
 @router.post("/upload")
 async def upload_book_image(
     file: UploadFile = File(...),
-    token: str = Depends(security)
+    token: str = Depends(security),
+    db: Session = Depends(get_db)
 ):
-    validate_image_file(file)
-
-    file_ext = os.path.splitext(file.filename)[1].lower()
-    unique_filename = f"{uuid.uuid4()}{file_ext}"
-    file_path = UPLOAD_DIR / unique_filename
-
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    saved = await store_image_upload(await receive_image_upload(file), db)
 
     return {
         "message": "Image uploade avec succs",
-        "filename": unique_filename,
-        "url": f"/uploads/books/{unique_filename}",
-        "size": os.path.getsize(file_path)
+        **saved
     }
 
 
 @router.post("/upload-multiple")
 async def upload_multiple_images(
     files: List[UploadFile] = File(...),
-    token: str = Depends(security)
+    token: str = Depends(security),
+    db: Session = Depends(get_db)
 ):
     if len(files) > MAX_FILES_PER_UPLOAD:
         raise HTTPException(
@@ -123,19 +358,16 @@ async def upload_multiple_images(
 
     for file in files:
         try:
-            validate_image_file(file)
-
-            file_ext = os.path.splitext(file.filename)[1].lower()
-            unique_filename = f"{uuid.uuid4()}{file_ext}"
-            file_path = UPLOAD_DIR / unique_filename
-
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
+            saved = await store_image_upload(await receive_image_upload(file), db)
 
             uploaded.append({
                 "original": file.filename,
-                "filename": unique_filename,
-                "url": f"/uploads/books/{unique_filename}"
+                "filename": saved["filename"],
+                "url": saved["url"],
+                "width": saved["width"],
+                "height": saved["height"],
+                "variants": saved["variants"],
+                "thumbnail_url": saved["thumbnail_url"]
             })
 
         except HTTPException as e:
@@ -149,18 +381,101 @@ async def upload_multiple_images(
     }
 
 
+# ============================================
+# DIRECT UPLOADS (presigned PUT)
+# ============================================
+
+@router.post("/presign", response_model=PresignedUploadResponse)
+async def presign_image_upload(
+    request: PresignedUploadRequest,
+    token: str = Depends(security)
+):
+    """
+    Signed URL to PUT an image straight to the storage bucket, so the upload itself does
+    not go through the API. The client then confirms it with POST /complete.
+    """
+    storage = get_storage()
+    if not storage.supports_presigned_upload:
+        raise HTTPException(status_code=501, detail="Upload direct non disponible, utilisez /upload")
+
+    validate_image_file(request.filename, request.content_type)
+    validate_image_size(request.size)
+
+    key = f"{INCOMING_PREFIX}/{uuid.uuid4()}{os.path.splitext(request.filename)[1].lower()}"
+    try:
+        upload_url = await run_in_threadpool(storage.presign_put, key, request.content_type, request.size)
+    except StorageError as e:
+        raise _storage_unavailable(f"presigning {key}", e)
+
+    return PresignedUploadResponse(
+        key=key,
+        upload_url=upload_url,
+        headers={"Content-Type": request.content_type},
+        expires_in=STORAGE_PRESIGN_EXPIRES
+    )
+
+
+@router.post("/complete")
+async def complete_image_upload(
+    request: CompleteUploadRequest,
+    token: str = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """
+    Publish an image sent with a presigned URL: same validation, deduplication and
+    variants as /upload. The incoming object is removed afterwards.
+    """
+    if not INCOMING_KEY_PATTERN.match(request.key):
+        raise HTTPException(status_code=400, detail="Cle d'upload invalide")
+
+    storage = get_storage()
+    work_dir, temp_file = await run_in_threadpool(_open_work_file)
+    await run_in_threadpool(temp_file.close)
+    try:
+        try:
+            await run_in_threadpool(storage.get_file, request.key, Path(temp_file.name))
+        except StorageObjectNotFound:
+            raise HTTPException(status_code=404, detail="Image non trouve")
+        except StorageError as e:
+            raise _storage_unavailable(f"reading {request.key}", e)
+
+        content_hash, size, header = await run_in_threadpool(_hash_file, Path(temp_file.name))
+        image_format = validate_image_header(header)
+        validate_image_size(size)
+        path = await run_in_threadpool(_name_by_content, Path(temp_file.name), content_hash, image_format)
+        received = {"work_dir": work_dir, "path": path, "format": image_format, "size": size, "sha256": content_hash}
+    except BaseException:
+        await run_in_threadpool(_cleanup, work_dir)
+        await run_in_threadpool(_delete_incoming, request.key)
+        raise
+
+    saved = await store_image_upload(received, db)
+    await run_in_threadpool(_delete_incoming, request.key)
+
+    return {
+        "message": "Image uploade avec succs",
+        **saved
+    }
+
+
 @router.delete("/delete/{filename}")
 async def delete_image(
     filename: str,
-    token: str = Depends(security)
+    token: str = Depends(security),
+    db: Session = Depends(get_db)
 ):
     safe_filename = sanitize_filename(filename)
-    file_path = UPLOAD_DIR / safe_filename
 
-    if not file_path.exists():
-        raise HTTPException(status_code=404, detail="Image non trouve")
-
-    os.remove(file_path)
+    try:
+        if not await run_in_threadpool(get_storage().exists, f"{UPLOAD_PREFIX}/{safe_filename}"):
+            raise HTTPException(status_code=404, detail="Image non trouve")
+
+        # Shared content: the files are deleted with the last reference, under its row lock
+        released = await run_in_threadpool(release_blob, db, safe_filename, _delete_with_variants)
+        if released is None:
+            await run_in_threadpool(_delete_with_variants, safe_filename)
+    except StorageError as e:
+        raise _storage_unavailable(f"deleting {safe_filename}", e)
 
     return {
         "message": "Image supprime avec succs",
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
 
@@ -59,6 +59,7 @@ class GoogleBookInfo(BaseModel):
     cover_image_url: Optional[str] = None
     preview_link: Optional[str] = None
     info_link: Optional[str] = None
+    provider: Optional[str] = None  # Source(s) du resultat, ex: "openlibrary+babelio" ou "database"
 
 class BookBase(BaseModel):
     isbn: str
@@ -78,6 +79,8 @@ class BookBase(BaseModel):
 class BookResponse(BookBase):
     id: int
     created_at: datetime
+    # Vignette WebP servie par l'API (URL absolue), cover_image_url reste l'URL d'origine
+    cover_thumbnail_url: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -151,15 +154,51 @@ class AnnouncementResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class AnnouncementCardResponse(BaseModel):
+    """Version allegee d'une annonce pour les grilles (fields=card)"""
+    id: int
+    title: str
+    cover_image_url: Optional[str] = None
+    cover_thumbnail_url: Optional[str] = None
+    price: float
+    condition: str
+    seller_username: str
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+class AnnouncementFacets(BaseModel):
+    """Nombre d'annonces par catgorie, tat et tranche de prix"""
+    categories: Dict[str, int]
+    conditions: Dict[str, int]
+    price_ranges: Dict[str, int]
+
 class AnnouncementListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None  # None when the exact count was not requested
     announcements: List[AnnouncementResponse]
+    next_cursor: Optional[str] = None  # Only set in cursor pagination mode
+    facets: Optional[AnnouncementFacets] = None  # Only set when facets=true
+
+class AnnouncementCardListResponse(BaseModel):
+    total: Optional[int] = None
+    announcements: List[AnnouncementCardResponse]
+    next_cursor: Optional[str] = None
+    facets: Optional[AnnouncementFacets] = None
 
 class ISBNLookupResponse(BaseModel):
     found: bool
     book_info: Optional[GoogleBookInfo] = None
     message: Optional[str] = None
 
+class ISBNBatchRequest(BaseModel):
+    """Liste d'ISBN a rechercher en une seule requete"""
+    isbns: List[str] = Field(..., min_length=1)
+
+class ISBNBatchItem(BaseModel):
+    """Une ligne du flux NDJSON renvoye par POST /isbn/batch"""
+    isbn: str
+    found: bool
+    book_info: Optional[GoogleBookInfo] = None
+
 class PriceCalculationResponse(BaseModel):
     """Rponse du calcul du prix final avec le score de condition"""
     market_price: float
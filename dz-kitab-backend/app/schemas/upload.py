@@ -0,0 +1,23 @@
+# app/schemas/upload.py
+
+from pydantic import BaseModel, Field
+from typing import Dict
+
+
+class PresignedUploadRequest(BaseModel):
+    """Fichier que le client va envoyer directement au stockage"""
+    filename: str
+    content_type: str
+    size: int = Field(..., gt=0)
+
+class PresignedUploadResponse(BaseModel):
+    """URL signee pour un PUT direct vers le stockage, a confirmer ensuite avec POST /complete"""
+    key: str
+    upload_url: str
+    method: str = "PUT"
+    headers: Dict[str, str]
+    expires_in: int
+
+class CompleteUploadRequest(BaseModel):
+    """Cle renvoyee par POST /presign, une fois le PUT termine"""
+    key: str
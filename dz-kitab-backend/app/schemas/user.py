@@ -125,6 +125,11 @@ class UserResponse(BaseModel):
     role: Optional[str] = "user"
     created_at: Optional[str] = None
     updated_at: Optional[str] = None
+
+    @validator('created_at', 'updated_at', pre=True)
+    def format_dates(cls, v):
+        """Datetimes of the ORM object (PUT /me), as str(user.created_at) in the other responses"""
+        return str(v) if v is not None else None
     
     class Config:
         from_attributes = True
@@ -0,0 +1,160 @@
+# app/services/announcement_loader.py
+
+from sqlalchemy.orm import Session, load_only
+from typing import Dict, List, Sequence, Tuple
+from app.models.book import Announcement, Book
+from app.models.user import User
+from app.schemas.book import AnnouncementResponse, AnnouncementCardResponse, BookResponse
+from app.services.cover_cache import cover_thumbnail_url, COVER_CARD_WIDTH
+
+# Colonnes d'Announcement necessaires a une carte (fields=card)
+CARD_ANNOUNCEMENT_COLUMNS = (
+    Announcement.id,
+    Announcement.book_id,
+    Announcement.user_id,
+    Announcement.price,
+    Announcement.condition,
+    Announcement.created_at,
+    Announcement.updated_at,
+)
+
+
+def enum_value(obj):
+    """Safe enum to string conversion (DB may return enum members or raw strings)"""
+    if hasattr(obj, 'value'):
+        return obj.value
+    return obj
+
+
+def load_books_and_sellers(
+    db: Session,
+    announcements: Sequence[Announcement]
+) -> Tuple[Dict[int, Book], Dict[int, User]]:
+    """
+    Fetch the books and sellers of a whole page of announcements.
+
+    Always runs at most two queries (one IN (...) per table), whatever the page size.
+    """
+    book_ids = {ann.book_id for ann in announcements}
+    user_ids = {ann.user_id for ann in announcements}
+
+    books = {}
+    if book_ids:
+        books = {book.id: book for book in db.query(Book).filter(Book.id.in_(book_ids)).all()}
+
+    users = {}
+    if user_ids:
+        users = {user.id: user for user in db.query(User).filter(User.id.in_(user_ids)).all()}
+
+    return books, users
+
+
+def book_response(book: Book, cover_width: int = COVER_CARD_WIDTH) -> BookResponse:
+    """Book as returned by the API, with the URL of its local cover thumbnail"""
+    response = BookResponse.model_validate(book)
+    response.cover_thumbnail_url = cover_thumbnail_url(book.id, book.cover_image_url, cover_width)
+    return response
+
+
+def build_announcement_response(
+    announcement: Announcement,
+    book: Book,
+    user: User,
+    cover_width: int = COVER_CARD_WIDTH
+) -> AnnouncementResponse:
+    """Build the API response for one announcement from already loaded rows"""
+    return AnnouncementResponse(
+        id=announcement.id,
+        book_id=announcement.book_id,
+        user_id=announcement.user_id,
+        category=enum_value(announcement.category),
+        price=announcement.price,
+        market_price=announcement.market_price,
+        final_calculated_price=announcement.final_calculated_price,
+        condition=enum_value(announcement.condition),
+        status=enum_value(announcement.status),
+        description=announcement.description,
+        custom_images=announcement.custom_images,
+        location=announcement.location,
+        page_count=announcement.page_count,
+        publication_date=announcement.publication_date,
+        views_count=announcement.views_count or 0,
+        created_at=announcement.created_at,
+        updated_at=announcement.updated_at,
+        book=book_response(book, cover_width),
+        user={
+            "id": user.id,
+            "username": user.username,
+            "email": user.email
+        }
+    )
+
+
+def format_announcements(db: Session, announcements: Sequence[Announcement]) -> List[AnnouncementResponse]:
+    """
+    Format a list of announcements with their nested book and seller.
+
+    Replaces the per-row Book/User lookups (2N+1 queries) with a constant number of queries.
+    Announcements whose book or seller no longer exists are skipped.
+    """
+    books, users = load_books_and_sellers(db, announcements)
+
+    formatted = []
+    for ann in announcements:
+        book = books.get(ann.book_id)
+        user = users.get(ann.user_id)
+        if book is None or user is None:
+            continue
+        formatted.append(build_announcement_response(ann, book, user))
+
+    return formatted
+
+
+def card_columns_only():
+    """Query option restricting an Announcement query to the columns a card needs"""
+    return load_only(*CARD_ANNOUNCEMENT_COLUMNS)
+
+
+def format_announcement_cards(db: Session, announcements: Sequence[Announcement]) -> List[AnnouncementCardResponse]:
+    """
+    Format announcements as slim listing cards.
+
+    Only the title/cover of books and the username of sellers are selected, as plain
+    tuples: no description text, no full ORM hydration.
+    """
+    book_ids = {ann.book_id for ann in announcements}
+    user_ids = {ann.user_id for ann in announcements}
+
+    books = {}
+    if book_ids:
+        books = {
+            row.id: row for row in
+            db.query(Book.id, Book.title, Book.cover_image_url).filter(Book.id.in_(book_ids)).all()
+        }
+
+    sellers = {}
+    if user_ids:
+        sellers = {
+            row.id: row.username for row in
+            db.query(User.id, User.username).filter(User.id.in_(user_ids)).all()
+        }
+
+    cards = []
+    for ann in announcements:
+        book = books.get(ann.book_id)
+        seller = sellers.get(ann.user_id)
+        if book is None or seller is None:
+            continue
+        cards.append(AnnouncementCardResponse(
+            id=ann.id,
+            title=book.title,
+            cover_image_url=book.cover_image_url,
+            cover_thumbnail_url=cover_thumbnail_url(book.id, book.cover_image_url),
+            price=ann.price,
+            condition=enum_value(ann.condition),
+            seller_username=seller,
+            created_at=ann.created_at,
+            updated_at=ann.updated_at
+        ))
+
+    return cards
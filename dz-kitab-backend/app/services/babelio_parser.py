@@ -0,0 +1,189 @@
+# app/services/babelio_parser.py
+
+import os
+import re
+from typing import Any, Dict, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+# "auto" (selectolax > lxml > bs4), ou un backend impose : "selectolax", "lxml", "bs4"
+BABELIO_PARSER = os.getenv("BABELIO_PARSER", "auto")
+
+PAGE_COUNT_PATTERN = re.compile(r'(\d+)\s+pages')
+PUBLISHER_PATTERN = re.compile(r'Editeur\s+:\s+([^\n]+)')
+
+# Fields extracted from a Babelio book page, before normalization:
+# title, author, description, cover_image_url, details (text of the references block)
+RawFields = Dict[str, Optional[str]]
+
+
+# Text fields join their text nodes with a space (then _clean collapses whitespace), so
+# "habitee.<br>J'etais" gives the same "habitee. J'etais" with every backend
+def _clean(text: Optional[str]) -> Optional[str]:
+    if text is None:
+        return None
+    return " ".join(text.split()) or None
+
+
+# ============================================
+# BACKENDS
+# ============================================
+
+class SelectolaxBackend:
+    """Lexbor (C) parser through selectolax: fastest, CSS selectors"""
+    name = "selectolax"
+
+    def __init__(self):
+        try:
+            from selectolax.lexbor import LexborHTMLParser as parser
+        except ImportError:
+            from selectolax.parser import HTMLParser as parser
+        self._parser = parser
+
+    def extract(self, html: str) -> RawFields:
+        tree = self._parser(html)
+
+        def text(selector: str) -> Optional[str]:
+            node = tree.css_first(selector)
+            return node.text(separator=" ") if node is not None else None
+
+        img = tree.css_first('img[itemprop="image"]')
+        details = tree.css_first('.livre_refs')
+        return {
+            "title": text('h1[itemprop="name"]'),
+            "author": text('span[itemprop="author"] a'),
+            "description": text('div#un_resume'),
+            "cover_image_url": img.attributes.get("src") if img is not None else None,
+            "details": details.text(separator="\n") if details is not None else None,
+        }
+
+
+class LxmlBackend:
+    """libxml2 (C) parser through lxml.html, XPath queries"""
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html
+        self._fromstring = lxml.html.fromstring
+
+    def extract(self, html: str) -> RawFields:
+        root = self._fromstring(html)
+
+        def first(xpath: str):
+            found = root.xpath(xpath)
+            return found[0] if found else None
+
+        def text(xpath: str) -> Optional[str]:
+            node = first(xpath)
+            return " ".join(node.itertext()) if node is not None else None
+
+        details = first('//*[contains(concat(" ", normalize-space(@class), " "), " livre_refs ")]')
+        return {
+            "title": text('//h1[@itemprop="name"]'),
+            "author": text('//span[@itemprop="author"]//a'),
+            "description": text('//div[@id="un_resume"]'),
+            "cover_image_url": first('//img[@itemprop="image"]/@src'),
+            "details": "\n".join(details.itertext()) if details is not None else None,
+        }
+
+
+def _relevant_tag(name: str, attrs: Dict[str, Any]) -> bool:
+    """Tags kept by the bs4 SoupStrainer: only the book header, summary and references"""
+    itemprop = attrs.get("itemprop")
+    if itemprop in ("name", "author", "image") and name in ("h1", "span", "img"):
+        return True
+    if name == "div" and attrs.get("id") == "un_resume":
+        return True
+    classes = attrs.get("class") or ""
+    if isinstance(classes, str):
+        classes = classes.split()
+    return "livre_refs" in classes
+
+
+class SoupBackend:
+    """
+    Pure-Python fallback: BeautifulSoup limited by a SoupStrainer, so only the relevant
+    subtrees are built (uses the lxml tree builder when installed).
+    """
+    name = "bs4"
+
+    def __init__(self):
+        try:
+            import lxml  # noqa: F401
+            self._builder = "lxml"
+        except ImportError:
+            self._builder = "html.parser"
+        self._strainer = SoupStrainer(_relevant_tag)
+
+    def extract(self, html: str) -> RawFields:
+        soup = BeautifulSoup(html, self._builder, parse_only=self._strainer)
+
+        def text(selector: str) -> Optional[str]:
+            node = soup.select_one(selector)
+            return node.get_text(" ") if node else None
+
+        img = soup.select_one('img[itemprop="image"]')
+        details = soup.select_one('.livre_refs')
+        return {
+            "title": text('h1[itemprop="name"]'),
+            "author": text('span[itemprop="author"] a'),
+            "description": text('div#un_resume'),
+            "cover_image_url": img.get("src") if img else None,
+            "details": details.get_text("\n") if details else None,
+        }
+
+
+BACKENDS = {
+    "selectolax": SelectolaxBackend,
+    "lxml": LxmlBackend,
+    "bs4": SoupBackend,
+}
+
+
+def get_parser_backend(name: str = BABELIO_PARSER):
+    """Requested backend, or the fastest installed one for "auto" (bs4 always works)"""
+    candidates = list(BACKENDS) if name == "auto" else [name, "bs4"]
+    for candidate in candidates:
+        try:
+            return BACKENDS[candidate]()
+        except (ImportError, KeyError):
+            continue
+    return SoupBackend()
+
+
+parser_backend = get_parser_backend()
+
+
+# ============================================
+# BOOK FIELDS
+# ============================================
+
+def parse_babelio_page(html: str, isbn: str, backend=None) -> Optional[Dict[str, Any]]:
+    """
+    Book info from a Babelio book page, or None if the page is not a book page.
+
+    Page count and publisher are read from the references block only, not from the
+    text of the whole page.
+    """
+    fields = (backend or parser_backend).extract(html)
+    title = _clean(fields["title"])
+    if not title:
+        return None
+
+    details = fields["details"] or ""
+    page_match = PAGE_COUNT_PATTERN.search(details)
+    publisher_match = PUBLISHER_PATTERN.search(details)
+    author = _clean(fields["author"])
+
+    return {
+        "isbn": isbn,
+        "title": title,
+        "authors": [author] if author else ["Auteur Inconnu"],
+        "description": _clean(fields["description"]),
+        "cover_image_url": fields["cover_image_url"],
+        "page_count": int(page_match.group(1)) if page_match else None,
+        "publisher": publisher_match.group(1).strip() if publisher_match else None,
+        "language": "fr",
+        "categories": ["Livre"],
+        "published_date": None # Hard to extract reliably without more complex regex
+    }
@@ -0,0 +1,77 @@
+# app/services/book_enrichment.py
+
+from typing import Any, Dict
+
+from sqlalchemy import func
+
+from app.database import SessionLocal
+from app.models.book import Announcement, Book
+from app.core.cache import invalidate_catalog_cache
+from app.services.isbn_cache import lookup_book_info
+from app.services.search import trigram_index
+
+# Colonnes completees depuis les fournisseurs ISBN (jamais ecrasees si le vendeur les a remplies)
+ENRICHED_FIELDS = (
+    "subtitle", "authors", "publisher", "published_date", "description",
+    "page_count", "categories", "cover_image_url", "preview_link", "info_link",
+)
+
+UNKNOWN_AUTHOR = "Auteur Inconnu"
+
+
+def _column_value(field: str, value: Any) -> Any:
+    if field in ("authors", "categories") and isinstance(value, list):
+        return ", ".join(v for v in value if v) or None
+    return value
+
+
+def fill_missing_fields(book: Book, book_info: Dict[str, Any]) -> bool:
+    """Copy provider values into the empty columns of a book; returns True if anything changed"""
+    changed = False
+    for field in ENRICHED_FIELDS:
+        current = getattr(book, field)
+        if current not in (None, "") and not (field == "authors" and current == UNKNOWN_AUTHOR):
+            continue
+        value = _column_value(field, book_info.get(field))
+        if value in (None, "") or (field == "authors" and value == UNKNOWN_AUTHOR):
+            continue
+        setattr(book, field, value)
+        changed = True
+    return changed
+
+
+async def enrich_book(book_id: int) -> None:
+    """
+    Background task: complete a book created from the seller's fields with provider metadata.
+
+    Runs after the 201 response of create_announcement. On change, the book's announcements
+    get a new updated_at (so ETags change) and the catalog caches are invalidated.
+    """
+    db = SessionLocal()
+    try:
+        book = db.get(Book, book_id)
+        if not book:
+            return
+
+        book_info = await lookup_book_info(db, book.isbn, include_books=False)
+        if not book_info:
+            return
+
+        authors_before = book.authors
+        if not fill_missing_fields(book, book_info):
+            return
+
+        db.query(Announcement).filter(Announcement.book_id == book.id).update(
+            {Announcement.updated_at: func.now()},
+            synchronize_session=False
+        )
+        db.commit()
+        invalidate_catalog_cache()
+        if book.authors != authors_before:
+            trigram_index.invalidate()
+        print(f" Book {book_id} enriched from {book_info.get('provider')}")
+    except Exception as e:
+        db.rollback()
+        print(f" Error enriching book {book_id}: {e}")
+    finally:
+        db.close()
@@ -0,0 +1,175 @@
+# app/services/cover_cache.py
+
+import os
+import time
+import asyncio
+import hashlib
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Optional, Set
+from urllib.parse import urlparse
+
+import httpx
+from PIL import Image
+
+from app.database import IS_VERCEL, ENVIRONMENT
+from app.core.http_clients import get_http_client
+from app.core.singleflight import SingleFlight
+
+# Vignettes WebP des couvertures distantes (OpenLibrary, Google Books, Babelio)
+COVER_DIR = Path(os.getenv("COVER_DIR", "uploads/covers"))
+COVER_WIDTHS = tuple(sorted(int(w) for w in os.getenv("COVER_WIDTHS", "160,320,640").split(",")))
+# Largeur utilisee pour les cartes / listes, et pour la page d'une annonce
+COVER_CARD_WIDTH = int(os.getenv("COVER_CARD_WIDTH", "320"))
+COVER_DETAIL_WIDTH = int(os.getenv("COVER_DETAIL_WIDTH", str(COVER_WIDTHS[-1])))
+# Pas de disque persistant sur Vercel : les URLs distantes sont renvoyees telles quelles
+COVER_PROXY_ENABLED = os.getenv("COVER_PROXY", "0" if IS_VERCEL else "1") == "1"
+COVER_ALLOWED_HOSTS = {
+    host.strip() for host in os.getenv(
+        "COVER_ALLOWED_HOSTS",
+        "covers.openlibrary.org,books.google.com,books.googleusercontent.com,www.babelio.com,babelio.com"
+    ).split(",") if host.strip()
+}
+COVER_MAX_BYTES = 10 * 1024 * 1024
+# Redirections suivies a la main, chaque cible est revalidee contre COVER_ALLOWED_HOSTS
+COVER_MAX_REDIRECTS = 3
+COVER_WEBP_QUALITY = 80
+COVER_MAX_CONCURRENT_FETCHES = 4
+# Une couverture introuvable n'est pas retentee avant ce delai (secondes)
+COVER_RETRY_AFTER = 3600
+
+# Les fichiers sont versionnes par l'URL source : ils ne changent jamais
+COVER_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# URL publique de l'API : le frontend est sur une autre origine, les vignettes doivent etre absolues.
+# Sans elle, cover_thumbnail_url renvoie l'URL distante d'origine.
+API_PUBLIC_URL = os.getenv(
+    "API_PUBLIC_URL", "http://localhost:8000" if ENVIRONMENT == "development" else ""
+).rstrip("/")
+COVER_PROXY_PATH = "/api/books/covers/"
+
+
+def cover_version(remote_url: str) -> str:
+    return hashlib.sha1(remote_url.encode()).hexdigest()[:10]
+
+
+def is_allowed_cover_url(url: str) -> bool:
+    parsed = urlparse(url)
+    return parsed.scheme in ("http", "https") and parsed.hostname in COVER_ALLOWED_HOSTS
+
+
+def is_proxied(remote_url: Optional[str]) -> bool:
+    """Only remote covers from known providers are proxied (no fetching of arbitrary hosts)"""
+    if not COVER_PROXY_ENABLED or not API_PUBLIC_URL or not remote_url:
+        return False
+    return is_allowed_cover_url(remote_url)
+
+
+def closest_width(width: int) -> int:
+    return min(COVER_WIDTHS, key=lambda w: (abs(w - width), -w))
+
+
+def cover_thumbnail_url(book_id: int, remote_url: Optional[str], width: int = COVER_CARD_WIDTH) -> Optional[str]:
+    """
+    Absolute URL of the local thumbnail proxy, or the original URL if not proxied.
+    Returned next to cover_image_url, which always keeps the stored remote URL.
+    """
+    if not is_proxied(remote_url):
+        return remote_url
+    return f"{API_PUBLIC_URL}{COVER_PROXY_PATH}{book_id}/{closest_width(width)}.webp?v={cover_version(remote_url)}"
+
+
+def is_cover_proxy_url(url: Optional[str]) -> bool:
+    """True for a thumbnail URL of this API (sent back by a client), which must never be stored as a cover"""
+    return bool(url) and urlparse(url).path.startswith(COVER_PROXY_PATH)
+
+
+def cover_path(book_id: int, remote_url: str, width: int) -> Path:
+    return COVER_DIR / f"{book_id}-{cover_version(remote_url)}-{width}.webp"
+
+
+def render_thumbnails(data: bytes, book_id: int, remote_url: str) -> None:
+    """Decode a cover once and write one WebP per width (never upscaled). CPU-bound: run in a thread."""
+    COVER_DIR.mkdir(parents=True, exist_ok=True)
+    with Image.open(BytesIO(data)) as image:
+        image.load()
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        for width in COVER_WIDTHS:
+            if image.width > width:
+                height = max(1, round(image.height * width / image.width))
+                thumbnail = image.resize((width, height), Image.LANCZOS)
+            else:
+                thumbnail = image
+            path = cover_path(book_id, remote_url, width)
+            tmp_path = path.with_suffix(".tmp")
+            thumbnail.save(tmp_path, "WEBP", quality=COVER_WEBP_QUALITY, method=4)
+            os.replace(tmp_path, path)
+
+
+async def download_cover(client: httpx.AsyncClient, remote_url: str) -> bytes:
+    """
+    Body of a remote cover, streamed and abandoned as soon as it exceeds COVER_MAX_BYTES.
+    Redirects are followed here, and only to hosts of COVER_ALLOWED_HOSTS.
+    """
+    url = remote_url
+    for _ in range(COVER_MAX_REDIRECTS + 1):
+        if not is_allowed_cover_url(url):
+            raise ValueError(f"host not allowed: {url}")
+        async with client.stream("GET", url, follow_redirects=False) as response:
+            if response.is_redirect and response.next_request is not None:
+                url = str(response.next_request.url)
+                continue
+            content_type = response.headers.get("content-type", "")
+            if response.status_code != 200 or not content_type.startswith("image/"):
+                raise ValueError(f"HTTP {response.status_code} ({content_type})")
+            if int(response.headers.get("content-length") or 0) > COVER_MAX_BYTES:
+                raise ValueError("image too large")
+            chunks, size = [], 0
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+                if size > COVER_MAX_BYTES:
+                    raise ValueError("image too large")
+                chunks.append(chunk)
+            return b"".join(chunks)
+    raise ValueError(f"too many redirects: {remote_url}")
+
+
+class CoverCache:
+    """
+    Fetches remote covers in the background and stores their thumbnails under COVER_DIR.
+
+    The proxy endpoint calls schedule() on a miss and redirects to the remote cover
+    meanwhile; each cover is downloaded once (concurrent misses share one fetch).
+    """
+
+    def __init__(self):
+        self._flights = SingleFlight()
+        self._tasks: Set[asyncio.Task] = set()
+        self._failed_until: Dict[str, float] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def schedule(self, book_id: int, remote_url: str) -> None:
+        key = f"{book_id}-{cover_version(remote_url)}"
+        if self._flights.in_flight(key) or self._failed_until.get(key, 0) > time.monotonic():
+            return
+        task = asyncio.ensure_future(self._flights.do(key, lambda: self._fetch(key, book_id, remote_url)))
+        # Keep a reference until done (the event loop only holds weak references to tasks)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, key: str, book_id: int, remote_url: str) -> bool:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(COVER_MAX_CONCURRENT_FETCHES)
+        async with self._semaphore:
+            try:
+                data = await download_cover(get_http_client("covers"), remote_url)
+                await asyncio.to_thread(render_thumbnails, data, book_id, remote_url)
+                return True
+            except Exception as e:
+                print(f" Error caching cover of book {book_id}: {e}")
+                self._failed_until[key] = time.monotonic() + COVER_RETRY_AFTER
+                return False
+
+
+cover_cache = CoverCache()
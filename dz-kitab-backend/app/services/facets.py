@@ -0,0 +1,89 @@
+# app/services/facets.py
+
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import case, func
+from app.models.book import Announcement, BookCategoryEnum, BookConditionEnum
+from app.services.announcement_loader import enum_value
+
+# Tranches de prix par défaut (DZD) : "min-max" ou "min-" pour une tranche ouverte
+DEFAULT_PRICE_RANGES = "0-1000,1000-2000,2000-5000,5000-"
+
+PriceRange = Tuple[str, float, Optional[float]]
+
+
+def parse_price_ranges(spec: Optional[str]) -> List[PriceRange]:
+    """
+    Parse "0-1000,1000-3000,3000-" into [(label, min, max)] (min inclusive, max exclusive).
+    """
+    ranges = []
+    for part in (spec or DEFAULT_PRICE_RANGES).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            low, _, high = part.partition("-")
+            low_value = float(low)
+            high_value = float(high) if high.strip() else None
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Tranche de prix invalide: {part}"
+            )
+        if high_value is not None and high_value <= low_value:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Tranche de prix invalide: {part}"
+            )
+        label = f"{low.strip()}-{high.strip()}" if high_value is not None else f"{low.strip()}+"
+        ranges.append((label, low_value, high_value))
+    return ranges
+
+
+def price_bucket_expression(ranges: List[PriceRange]):
+    """CASE expression mapping Announcement.price to the label of its range (NULL if none)"""
+    whens = []
+    for label, low, high in ranges:
+        condition = Announcement.price >= low
+        if high is not None:
+            condition = condition & (Announcement.price < high)
+        whens.append((condition, label))
+    return case(*whens, else_=None)
+
+
+def compute_facets(query, ranges: List[PriceRange]) -> Dict[str, Dict[str, int]]:
+    """
+    Count announcements per category, condition and price range in a single GROUP BY query.
+
+    `query` is the filtered Announcement query, before ordering and pagination.
+    Every category/condition/range is returned, with 0 when it has no match.
+    """
+    bucket = price_bucket_expression(ranges).label("price_bucket")
+    rows = query.order_by(None).with_entities(
+        Announcement.category,
+        Announcement.condition,
+        bucket,
+        func.count(Announcement.id)
+    ).group_by(
+        Announcement.category,
+        Announcement.condition,
+        bucket
+    ).all()
+
+    categories = {category.value: 0 for category in BookCategoryEnum}
+    conditions = {condition.value: 0 for condition in BookConditionEnum}
+    price_ranges = {label: 0 for label, _, _ in ranges}
+
+    for category, condition, price_label, count in rows:
+        category = enum_value(category)
+        condition = enum_value(condition)
+        categories[category] = categories.get(category, 0) + count
+        conditions[condition] = conditions.get(condition, 0) + count
+        if price_label is not None:
+            price_ranges[price_label] += count
+
+    return {
+        "categories": categories,
+        "conditions": conditions,
+        "price_ranges": price_ranges
+    }
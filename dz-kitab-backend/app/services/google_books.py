@@ -3,6 +3,7 @@
 import httpx
 from typing import Optional, Dict, Any
 from fastapi import HTTPException, status
+from app.core.http_clients import get_http_client
 
 GOOGLE_BOOKS_API_URL = "https://www.googleapis.com/books/v1/volumes"
 
@@ -22,14 +23,13 @@ async def fetch_book_by_isbn(isbn: str) -> Optional[Dict[str, Any]]:
         clean_isbn = isbn.replace("-", "").replace(" ", "")
         
         # Query Google Books API
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                GOOGLE_BOOKS_API_URL,
-                params={"q": f"isbn:{clean_isbn}"},
-                timeout=10.0
-            )
-            response.raise_for_status()
-            data = response.json()
+        client = get_http_client("google_books")
+        response = await client.get(
+            GOOGLE_BOOKS_API_URL,
+            params={"q": f"isbn:{clean_isbn}"}
+        )
+        response.raise_for_status()
+        data = response.json()
         
         # Check if we got results
         if data.get("totalItems", 0) == 0:
@@ -97,17 +97,16 @@ async def search_books(query: str, max_results: int = 10) -> list:
         List of books matching the query
     """
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                GOOGLE_BOOKS_API_URL,
-                params={
-                    "q": query,
-                    "maxResults": min(max_results, 40),  # Google Books API max is 40
-                },
-                timeout=10.0
-            )
-            response.raise_for_status()
-            data = response.json()
+        client = get_http_client("google_books")
+        response = await client.get(
+            GOOGLE_BOOKS_API_URL,
+            params={
+                "q": query,
+                "maxResults": min(max_results, 40),  # Google Books API max is 40
+            }
+        )
+        response.raise_for_status()
+        data = response.json()
         
         if data.get("totalItems", 0) == 0:
             return []
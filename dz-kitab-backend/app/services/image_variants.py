@@ -0,0 +1,185 @@
+# app/services/image_variants.py
+
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from PIL import Image, ImageOps, features
+
+from app.database import IS_VERCEL
+
+# Largeurs des variantes WebP generees pour chaque photo uploadee (jamais agrandies)
+UPLOAD_VARIANT_WIDTHS = tuple(sorted(int(w) for w in os.getenv("UPLOAD_VARIANT_WIDTHS", "320,640,1280").split(",")))
+# Variante utilisee pour les cartes / listes
+UPLOAD_THUMBNAIL_WIDTH = int(os.getenv("UPLOAD_THUMBNAIL_WIDTH", str(UPLOAD_VARIANT_WIDTHS[0])))
+UPLOAD_WEBP_QUALITY = int(os.getenv("UPLOAD_WEBP_QUALITY", "80"))
+# Variantes AVIF en plus du WebP, choisies par /uploads selon l'en-tete Accept
+# (Pillow >= 11.3 ou le plugin pillow-avif-plugin)
+UPLOAD_AVIF_VARIANTS = os.getenv("UPLOAD_AVIF_VARIANTS", "0") == "1"
+UPLOAD_AVIF_QUALITY = int(os.getenv("UPLOAD_AVIF_QUALITY", "55"))
+# Originaux JPEG/PNG : copies pleine taille de meme nom (x.webp, x.avif), servies par /uploads
+# a la place de x.jpg quand l'en-tete Accept les annonce
+UPLOAD_NEGOTIATED_ORIGINALS = (".jpg", ".jpeg", ".png")
+# Processus dedies au traitement Pillow (0 = thread du worker, ex. sur Vercel)
+IMAGE_PROCESS_WORKERS = int(os.getenv("IMAGE_PROCESS_WORKERS", "0" if IS_VERCEL else "2"))
+
+# Reencodage des originaux qui contiennent des metadonnees (les autres sont stockes tels quels).
+# Un JPEG non pivote garde ses tables de quantification (quality="keep") ; ces options
+# servent aux images pivotees et aux autres formats
+ORIGINAL_SAVE_OPTIONS = {
+    "jpeg": {"quality": 95, "optimize": True},
+    "png": {"optimize": True},
+    "webp": {"quality": 90},
+    "gif": {},
+}
+# Seules ces cles de Image.info sont conservees (pas d'EXIF, GPS, XMP ni commentaires)
+KEPT_IMAGE_INFO = ("transparency", "icc_profile", "duration", "loop", "background", "disposal")
+# Cles de structure du fichier (JFIF, resolution, entrelacement...) : ne declenchent pas de reencodage
+STRUCTURAL_IMAGE_INFO = (
+    "jfif", "jfif_version", "jfif_unit", "jfif_density", "dpi", "adobe", "adobe_transform",
+    "progressive", "progression", "gamma", "srgb", "chromaticity", "aspect", "interlace",
+    "version", "extension", "timestamp",
+)
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def variant_filename(stem: str, width: int, ext: str = ".webp") -> str:
+    return f"{stem}-{width}{ext}"
+
+
+def avif_enabled() -> bool:
+    return UPLOAD_AVIF_VARIANTS and "avif" in features.modules and features.check_module("avif")
+
+
+def strip_metadata(source_path: str, image_format: str) -> bool:
+    """
+    Rewrite an uploaded original without its metadata (EXIF, GPS, device, XMP, comments),
+    in place and in the same format. The EXIF orientation is applied to the pixels first.
+    Animated images keep all their frames. Runs in a worker process.
+
+    Files without metadata are left untouched (returns False), and JPEGs that need no
+    rotation are re-encoded with their own quantization tables, to limit generation loss.
+    """
+    source = Path(source_path)
+    tmp_path = source.with_suffix(".clean")
+
+    with Image.open(source) as image:
+        exif = image.getexif()
+        if not exif and all(key in KEPT_IMAGE_INFO or key in STRUCTURAL_IMAGE_INFO for key in image.info):
+            return False
+
+        animated = getattr(image, "is_animated", False)
+        rotated = not animated and exif.get(0x0112, 1) != 1
+        cleaned = ImageOps.exif_transpose(image) if rotated else image
+        cleaned.info = {key: value for key, value in image.info.items() if key in KEPT_IMAGE_INFO}
+        if image_format == "jpeg" and not rotated:
+            options = {"quality": "keep", "optimize": True}
+        else:
+            options = dict(ORIGINAL_SAVE_OPTIONS[image_format])
+        if image_format != "gif":
+            options["exif"] = b""
+        cleaned.save(tmp_path, format=image_format.upper(), save_all=animated, **options)
+
+    os.replace(tmp_path, source)
+    return True
+
+
+def render_variants(source_path: str, widths=UPLOAD_VARIANT_WIDTHS) -> Dict[str, Any]:
+    """
+    Decode an uploaded photo once and write one WebP per width next to it (plus an AVIF
+    with UPLOAD_AVIF_VARIANTS). JPEG and PNG originals also get full-size WebP/AVIF copies
+    with the same stem, listed in "siblings", for Accept negotiation on /uploads.
+
+    The EXIF orientation is applied to the pixels, then all metadata (EXIF, GPS, XMP)
+    is dropped: nothing is passed to the WebP encoder. Runs in a worker process.
+    """
+    source = Path(source_path)
+    stem = source.stem
+    with_avif = avif_enabled()
+
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or "A" in image.mode else "RGB")
+        width, height = image.size
+
+        variants = []
+        for variant_width in widths:
+            if width > variant_width:
+                variant_height = max(1, round(height * variant_width / width))
+                resized = image.resize((variant_width, variant_height), Image.LANCZOS)
+            else:
+                resized = image
+            path = source.with_name(variant_filename(stem, variant_width))
+            tmp_path = path.with_suffix(".tmp")
+            resized.save(tmp_path, "WEBP", quality=UPLOAD_WEBP_QUALITY, method=4)
+            os.replace(tmp_path, path)
+            variant = {
+                "width": variant_width,
+                "actual_width": resized.width,
+                "height": resized.height,
+                "filename": path.name,
+            }
+            if with_avif:
+                avif_path = source.with_name(variant_filename(stem, variant_width, ".avif"))
+                resized.save(tmp_path, "AVIF", quality=UPLOAD_AVIF_QUALITY)
+                os.replace(tmp_path, avif_path)
+                variant["avif_filename"] = avif_path.name
+            variants.append(variant)
+
+        siblings = []
+        if source.suffix.lower() in UPLOAD_NEGOTIATED_ORIGINALS:
+            encoders = [(".webp", "WEBP", {"quality": UPLOAD_WEBP_QUALITY, "method": 4})]
+            if with_avif:
+                encoders.append((".avif", "AVIF", {"quality": UPLOAD_AVIF_QUALITY}))
+            for ext, encoder, options in encoders:
+                path = source.with_suffix(ext)
+                tmp_path = source.with_suffix(".tmp")
+                image.save(tmp_path, encoder, **options)
+                os.replace(tmp_path, path)
+                siblings.append(path.name)
+
+    return {"width": width, "height": height, "variants": variants, "siblings": siblings}
+
+
+def _get_process_pool() -> Optional[ProcessPoolExecutor]:
+    global _process_pool
+    if IMAGE_PROCESS_WORKERS <= 0:
+        return None
+    if _process_pool is None:
+        # Spawned workers: forking a threaded uvicorn/gunicorn worker can deadlock on inherited locks
+        _process_pool = ProcessPoolExecutor(
+            max_workers=IMAGE_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+
+async def _run_in_pool(func, *args):
+    pool = _get_process_pool()
+    if pool is None:
+        return await asyncio.to_thread(func, *args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, func, *args)
+
+
+async def sanitize_upload(source_path: Path, image_format: str) -> bool:
+    """Strip the metadata of an original off the event loop, in the process pool"""
+    return await _run_in_pool(strip_metadata, str(source_path), image_format)
+
+
+async def process_upload(source_path: Path) -> Dict[str, Any]:
+    """Generate the WebP variants of an upload off the event loop, in the process pool"""
+    return await _run_in_pool(render_variants, str(source_path))
+
+
+def shutdown_process_pool() -> None:
+    """Stop the image worker processes (application shutdown)"""
+    global _process_pool
+    pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,231 @@
+# app/services/isbn_cache.py
+
+import os
+import json
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.http_clients import PROVIDER_SETTINGS
+from app.database import SessionLocal
+from app.core.singleflight import SingleFlight
+from app.models.book import Book
+from app.models.isbn_cache import IsbnLookupCache
+from app.services.isbn_scraper import (
+    fetch_book_by_isbn_scraping,
+    fetch_books_from_openlibrary,
+    call_provider,
+    IsbnProviderError,
+    OPENLIBRARY_BATCH_SIZE
+)
+
+# Duree de validite d'une reponse trouvee (secondes, 30 jours par defaut)
+ISBN_CACHE_TTL = int(os.getenv("ISBN_CACHE_TTL", str(30 * 24 * 3600)))
+# Duree de validite d'un "ISBN introuvable" (secondes, 1 jour par defaut)
+ISBN_CACHE_NEGATIVE_TTL = int(os.getenv("ISBN_CACHE_NEGATIVE_TTL", str(24 * 3600)))
+
+# Nombre maximum d'ISBN par requete POST /isbn/batch
+ISBN_BATCH_MAX_SIZE = int(os.getenv("ISBN_BATCH_MAX_SIZE", "50"))
+# Recherches individuelles simultanees d'un lot (par defaut le plus petit pool de connexions
+# des fournisseurs : au-dela, les requetes attendent une connexion et expirent)
+ISBN_BATCH_CONCURRENCY = int(os.getenv(
+    "ISBN_BATCH_CONCURRENCY",
+    str(min(PROVIDER_SETTINGS[name]["limits"].max_connections for name in ("openlibrary", "babelio", "google_books")))
+))
+
+# Recherches en cours, partagees entre les requetes simultanees pour un meme ISBN
+isbn_lookups = SingleFlight()
+
+
+def normalize_isbn(isbn: str) -> str:
+    """Strip dashes and spaces so "978-2-07-061275-8" and "9782070612758" share one entry"""
+    return isbn.replace("-", "").replace(" ", "").strip()
+
+
+def is_valid_isbn(isbn: str) -> bool:
+    """Normalized ISBN-13 (13 digits) or ISBN-10 (9 digits + digit or X)"""
+    if len(isbn) == 13:
+        return isbn.isdigit()
+    return len(isbn) == 10 and isbn[:9].isdigit() and (isbn[9].isdigit() or isbn[9] in "xX")
+
+
+def book_info_from_book(book: Book) -> Dict[str, Any]:
+    """Provider-shaped book info (see GoogleBookInfo) built from an existing Book row"""
+    return {
+        "isbn": book.isbn,
+        "title": book.title,
+        "subtitle": book.subtitle,
+        "authors": [a.strip() for a in (book.authors or "").split(",") if a.strip()],
+        "publisher": book.publisher,
+        "published_date": book.published_date,
+        "description": book.description,
+        "page_count": book.page_count,
+        "categories": [c.strip() for c in (book.categories or "").split(",") if c.strip()],
+        "language": book.language or "fr",
+        "cover_image_url": book.cover_image_url,
+        "preview_link": book.preview_link,
+        "info_link": book.info_link,
+        "provider": "database",
+    }
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite returns naive timestamps, stored in UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def get_cached_lookup(db: Session, isbn: str) -> Optional[IsbnLookupCache]:
+    """Unexpired cache entry for a normalized ISBN, or None"""
+    entry = db.get(IsbnLookupCache, isbn)
+    if entry is None or _as_utc(entry.expires_at) <= datetime.now(timezone.utc):
+        return None
+    return entry
+
+
+def store_lookup(db: Session, isbn: str, book_info: Optional[Dict[str, Any]]) -> None:
+    """Record a provider answer (book_info=None for "not found") with the matching TTL"""
+    now = datetime.now(timezone.utc)
+    ttl = ISBN_CACHE_TTL if book_info else ISBN_CACHE_NEGATIVE_TTL
+    try:
+        db.merge(IsbnLookupCache(
+            isbn=isbn,
+            found=book_info is not None,
+            payload=json.dumps(book_info) if book_info else None,
+            fetched_at=now,
+            expires_at=now + timedelta(seconds=ttl)
+        ))
+        db.commit()
+    except SQLAlchemyError as e:
+        # Concurrent lookup of the same ISBN already stored it: nothing to do
+        db.rollback()
+        print(f" Error storing ISBN cache entry: {e}")
+
+
+def _store_lookup_in_own_session(isbn: str, book_info: Optional[Dict[str, Any]]) -> None:
+    db = SessionLocal()
+    try:
+        store_lookup(db, isbn, book_info)
+    finally:
+        db.close()
+
+
+async def _fetch_and_store(isbn: str, known_records: Optional[Dict[str, Optional[Dict[str, Any]]]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Shared provider lookup of one ISBN, recorded in the cache by the shared task itself
+    (own session): the answer is stored even if the request that started it is cancelled.
+    """
+    book_info = await fetch_book_by_isbn_scraping(isbn, raise_on_error=True, known_records=known_records)
+    await asyncio.to_thread(_store_lookup_in_own_session, isbn, book_info)
+    return book_info
+
+
+def local_book_info(db: Session, isbn: str, include_books: bool = True) -> Tuple[bool, Optional[Dict[str, Any]]]:
+    """
+    (answered, book_info) from the books table or the cache, without any network call.
+
+    answered is False when only the providers can tell (book_info is then None).
+    include_books=False skips the books table (used to enrich an existing row).
+    """
+    if include_books:
+        book = db.query(Book).filter(Book.isbn == isbn).first()
+        if book:
+            return True, book_info_from_book(book)
+
+    entry = get_cached_lookup(db, isbn)
+    if entry is not None:
+        return True, json.loads(entry.payload) if entry.found else None
+
+    return False, None
+
+
+async def lookup_book_info(db: Session, isbn: str, include_books: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Book info for an ISBN, hitting OpenLibrary/Babelio only when nothing local answers.
+
+    Order: existing Book row, then unexpired cache entry (positive or negative),
+    then the providers. Provider outages are not cached as misses.
+    Concurrent lookups of the same ISBN share a single provider round-trip.
+    """
+    isbn = normalize_isbn(isbn)
+
+    answered, book_info = local_book_info(db, isbn, include_books)
+    if answered:
+        return book_info
+
+    try:
+        book_info, _ = await isbn_lookups.do(isbn, lambda: _fetch_and_store(isbn))
+    except IsbnProviderError:
+        return None
+    return book_info
+
+
+async def _openlibrary_batch(isbns: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """OpenLibrary answers for many ISBNs, OPENLIBRARY_BATCH_SIZE per call (chunks run concurrently)"""
+    chunks = [isbns[i:i + OPENLIBRARY_BATCH_SIZE] for i in range(0, len(isbns), OPENLIBRARY_BATCH_SIZE)]
+    answers: Dict[str, Optional[Dict[str, Any]]] = {}
+    results = await asyncio.gather(
+        *[call_provider("openlibrary", fetch_books_from_openlibrary(chunk)) for chunk in chunks],
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, IsbnProviderError):
+            # Chunk ISBNs are left out: the per-ISBN lookup will query OpenLibrary again
+            print(f" ISBN provider unavailable: {result}")
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            answers.update(result)
+    return answers
+
+
+async def lookup_book_infos(db: Session, isbns: List[str]) -> AsyncIterator[Tuple[str, Optional[Dict[str, Any]]]]:
+    """
+    Resolve many ISBNs, yielding (isbn, book_info or None) as soon as each one is known.
+
+    Malformed ISBNs are answered None without calling any provider. Known books and
+    cache entries are answered with one IN query each. The rest go to OpenLibrary with
+    multi-key calls, and only ISBNs it could not fully describe are looked up
+    individually (other providers, merged with the OpenLibrary record), at most
+    ISBN_BATCH_CONCURRENCY at a time.
+    """
+    remaining = []
+    for isbn in dict.fromkeys(normalize_isbn(isbn) for isbn in isbns if isbn.strip()):
+        if is_valid_isbn(isbn):
+            remaining.append(isbn)
+        else:
+            yield isbn, None
+
+    if remaining:
+        for book in db.query(Book).filter(Book.isbn.in_(remaining)).all():
+            remaining.remove(book.isbn)
+            yield book.isbn, book_info_from_book(book)
+
+    if remaining:
+        now = datetime.now(timezone.utc)
+        entries = db.query(IsbnLookupCache).filter(IsbnLookupCache.isbn.in_(remaining)).all()
+        for entry in entries:
+            if _as_utc(entry.expires_at) > now:
+                remaining.remove(entry.isbn)
+                yield entry.isbn, json.loads(entry.payload) if entry.found else None
+
+    if not remaining:
+        return
+
+    openlibrary = await _openlibrary_batch(remaining)
+    # Bounded fan-out: a 50-ISBN batch must not queue more requests than the provider pools hold
+    slots = asyncio.Semaphore(ISBN_BATCH_CONCURRENCY)
+
+    async def resolve(isbn: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        known = {"openlibrary": openlibrary[isbn]} if isbn in openlibrary else None
+        try:
+            async with slots:
+                book_info, _ = await isbn_lookups.do(isbn, lambda: _fetch_and_store(isbn, known))
+        except IsbnProviderError:
+            return isbn, None
+        return isbn, book_info
+
+    for next_result in asyncio.as_completed([resolve(isbn) for isbn in remaining]):
+        yield await next_result
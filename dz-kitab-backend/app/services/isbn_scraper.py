@@ -1,107 +1,410 @@
 # app/services/isbn_scraper.py
 
+import os
+import time
+import asyncio
 import httpx
-from bs4 import BeautifulSoup
-from typing import Optional, Dict, Any
+from collections import deque
+from typing import Optional, Dict, Any, List, Awaitable
 from fastapi import HTTPException, status
-import re
+from app.core.http_clients import get_http_client
+from app.services.babelio_parser import parse_babelio_page
+from app.services.google_books import fetch_book_by_isbn as fetch_google_book_by_isbn
+
+class IsbnProviderError(Exception):
+    """A provider could not be reached or failed (as opposed to "ISBN not found")"""
+
+
+def is_transient_status(status_code: int) -> bool:
+    return status_code == 429 or status_code >= 500
+
 
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
 }
 
-async def fetch_book_from_openlibrary(isbn: str) -> Optional[Dict[str, Any]]:
-    """Fetch book info from Open Library API (Open Source alternative)"""
+# Delai maximum accorde a chaque fournisseur (secondes) avant de l'abandonner
+PROVIDER_DEADLINES = {
+    "openlibrary": float(os.getenv("ISBN_DEADLINE_OPENLIBRARY", "5")),
+    "google_books": float(os.getenv("ISBN_DEADLINE_GOOGLE_BOOKS", "5")),
+    "babelio": float(os.getenv("ISBN_DEADLINE_BABELIO", "6")),
+}
+
+# Un enregistrement avec tous ces champs est renvoye sans attendre les autres fournisseurs
+COMPLETE_FIELDS = ("title", "authors", "publisher", "page_count", "cover_image_url", "description")
+
+MERGED_FIELDS = (
+    "title", "subtitle", "authors", "publisher", "published_date", "description",
+    "page_count", "categories", "language", "cover_image_url", "preview_link", "info_link"
+)
+
+# Valeurs de remplissage de Babelio, considerees comme absentes lors de la fusion
+PLACEHOLDER_VALUES = {
+    "authors": ["Auteur Inconnu"],
+    "categories": ["Livre"],
+}
+
+# Nombre maximum d'ISBN par appel OpenLibrary (bibkeys=ISBN:a,ISBN:b,...)
+OPENLIBRARY_BATCH_SIZE = int(os.getenv("OPENLIBRARY_BATCH_SIZE", "20"))
+
+
+def parse_openlibrary_record(isbn: str, book_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize one OpenLibrary jscmd=data entry"""
+    return {
+        "isbn": isbn,
+        "title": book_data.get("title", ""),
+        "subtitle": book_data.get("subtitle"),
+        "authors": [a.get("name") for a in book_data.get("authors", [])],
+        "publisher": book_data.get("publishers", [{}])[0].get("name") if book_data.get("publishers") else None,
+        "published_date": book_data.get("publish_date"),
+        "description": book_data.get("notes") or book_data.get("title"),
+        "page_count": book_data.get("number_of_pages"),
+        "categories": [s.get("name") for s in book_data.get("subjects", [])[:3]],
+        "language": "fr", # OpenLibrary usually has multi-lang, defaulting to fr for consistency
+        "cover_image_url": book_data.get("cover", {}).get("large") or book_data.get("cover", {}).get("medium"),
+        "preview_link": book_data.get("url"),
+        "info_link": book_data.get("url"),
+    }
+
+
+async def fetch_books_from_openlibrary(isbns: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Fetch several ISBNs in one OpenLibrary call (bibkeys accepts a comma-separated list).
+
+    Returns {isbn: record or None}; raises IsbnProviderError when OpenLibrary is unavailable.
+    """
     try:
-        url = f"https://openlibrary.org/api/books?bibkeys=ISBN:{isbn}&format=json&jscmd=data"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=HEADERS, timeout=10.0)
-            if response.status_code != 200:
-                return None
-            data = response.json()
-            
-        key = f"ISBN:{isbn}"
-        if key not in data:
-            return None
-        
-        book_data = data[key]
-        
-        return {
-            "isbn": isbn,
-            "title": book_data.get("title", ""),
-            "subtitle": book_data.get("subtitle"),
-            "authors": [a.get("name") for a in book_data.get("authors", [])],
-            "publisher": book_data.get("publishers", [{}])[0].get("name") if book_data.get("publishers") else None,
-            "published_date": book_data.get("publish_date"),
-            "description": book_data.get("notes") or book_data.get("title"),
-            "page_count": book_data.get("number_of_pages"),
-            "categories": [s.get("name") for s in book_data.get("subjects", [])[:3]],
-            "language": "fr", # OpenLibrary usually has multi-lang, defaulting to fr for consistency
-            "cover_image_url": book_data.get("cover", {}).get("large") or book_data.get("cover", {}).get("medium"),
-            "preview_link": book_data.get("url"),
-            "info_link": book_data.get("url"),
-        }
+        client = get_http_client("openlibrary")
+        response = await client.get(
+            "/api/books",
+            params={"bibkeys": ",".join(f"ISBN:{isbn}" for isbn in isbns), "format": "json", "jscmd": "data"},
+            headers=HEADERS
+        )
+        if is_transient_status(response.status_code):
+            raise IsbnProviderError(f"OpenLibrary HTTP {response.status_code}")
+        if response.status_code != 200:
+            return {isbn: None for isbn in isbns}
+        data = response.json()
+    except (httpx.HTTPError, IsbnProviderError) as e:
+        raise IsbnProviderError(f"OpenLibrary: {e}") from e
     except Exception as e:
         print(f" Error fetching from OpenLibrary: {e}")
-        return None
+        return {isbn: None for isbn in isbns}
+
+    results = {}
+    for isbn in isbns:
+        book_data = data.get(f"ISBN:{isbn}")
+        try:
+            results[isbn] = parse_openlibrary_record(isbn, book_data) if book_data else None
+        except Exception as e:
+            print(f" Error parsing OpenLibrary record {isbn}: {e}")
+            results[isbn] = None
+    return results
+
+
+async def fetch_book_from_openlibrary(isbn: str) -> Optional[Dict[str, Any]]:
+    """Fetch book info from Open Library API (Open Source alternative)"""
+    results = await fetch_books_from_openlibrary([isbn])
+    return results.get(isbn)
 
 async def scrape_book_from_babelio(isbn: str) -> Optional[Dict[str, Any]]:
     """Scrape book info from Babelio (French book community)"""
     try:
         # Babelio often uses ISBN13 in search
-        search_url = f"https://www.babelio.com/resrecherche.php?search={isbn}"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(search_url, headers=HEADERS, timeout=10.0, follow_redirects=True)
-            if response.status_code != 200:
-                return None
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # If we are on a result page instead of a book page, we need to click the first result
-            # But usually searching by ISBN redirects to the book page
-            
-            title_tag = soup.select_one('h1[itemprop="name"]')
-            if not title_tag:
-                return None
-            
-            author_tag = soup.select_one('span[itemprop="author"] a')
-            desc_tag = soup.select_one('div#un_resume')
-            img_tag = soup.select_one('img[itemprop="image"]')
-            
-            # Extract more details from page
-            details_text = soup.get_text()
-            page_match = re.search(r'(\d+)\s+pages', details_text)
-            publisher_match = re.search(r'Editeur\s+:\s+([^\n]+)', details_text)
-            
-            return {
-                "isbn": isbn,
-                "title": title_tag.get_text(strip=True),
-                "authors": [author_tag.get_text(strip=True)] if author_tag else ["Auteur Inconnu"],
-                "description": desc_tag.get_text(strip=True) if desc_tag else None,
-                "cover_image_url": img_tag['src'] if img_tag else None,
-                "page_count": int(page_match.group(1)) if page_match else None,
-                "publisher": publisher_match.group(1).strip() if publisher_match else None,
-                "language": "fr",
-                "categories": ["Livre"],
-                "published_date": None # Hard to extract reliably without more complex regex
-            }
+        client = get_http_client("babelio")
+        response = await client.get("/resrecherche.php", params={"search": isbn}, headers=HEADERS)
+        if is_transient_status(response.status_code):
+            raise IsbnProviderError(f"Babelio HTTP {response.status_code}")
+        if response.status_code != 200:
+            return None
+        
+        # If we are on a result page instead of a book page, parse_babelio_page returns None
+        # But usually searching by ISBN redirects to the book page
+        # Parsing is CPU-bound: keep it off the event loop
+        return await asyncio.to_thread(parse_babelio_page, response.text, isbn)
+    except (httpx.HTTPError, IsbnProviderError) as e:
+        raise IsbnProviderError(f"Babelio: {e}") from e
     except Exception as e:
         print(f" Error scraping from Babelio: {e}")
         return None
 
-async def fetch_book_by_isbn_scraping(isbn: str) -> Optional[Dict[str, Any]]:
+async def fetch_book_from_google_books(isbn: str) -> Optional[Dict[str, Any]]:
+    """Google Books lookup with the same error contract as the other providers"""
+    try:
+        return await fetch_google_book_by_isbn(isbn)
+    except HTTPException as e:
+        if e.status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+            raise IsbnProviderError(f"Google Books: {e.detail}") from e
+        return None
+
+
+# ============================================
+# CIRCUIT BREAKER / PROVIDER HEALTH
+# ============================================
+
+# Nombre d'appels recents pris en compte pour le taux d'erreur et la latence
+BREAKER_WINDOW = int(os.getenv("ISBN_BREAKER_WINDOW", "50"))
+# Nombre minimum d'appels dans la fenetre avant de pouvoir ouvrir le circuit
+BREAKER_MIN_CALLS = int(os.getenv("ISBN_BREAKER_MIN_CALLS", "5"))
+# Ouverture si la part d'erreurs (ou d'appels lents) depasse ce seuil
+BREAKER_FAILURE_RATE = float(os.getenv("ISBN_BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_SLOW_CALL_RATE = float(os.getenv("ISBN_BREAKER_SLOW_CALL_RATE", "0.8"))
+# Un appel est "lent" au-dela de cette fraction du delai du fournisseur
+BREAKER_SLOW_CALL_RATIO = float(os.getenv("ISBN_BREAKER_SLOW_CALL_RATIO", "0.8"))
+# Duree d'ouverture avant un appel de test (secondes)
+BREAKER_COOLDOWN = float(os.getenv("ISBN_BREAKER_COOLDOWN", "30"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def _percentile(values: List[float], percent: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class ProviderCircuitBreaker:
+    """
+    Per-provider circuit breaker over a rolling window of recent calls.
+
+    closed: calls go through. The circuit opens when, over at least BREAKER_MIN_CALLS
+    calls, the error rate or the slow-call rate crosses its threshold.
+    open: calls are skipped immediately (no timeout to wait out) for BREAKER_COOLDOWN seconds.
+    half_open: a single probe call is let through; success closes the circuit, failure reopens it.
+
+    "ISBN not found" is a successful call. State is per process (one per gunicorn worker).
+    """
+
+    def __init__(self, name: str, slow_call_threshold: float):
+        self.name = name
+        self.slow_call_threshold = slow_call_threshold
+        self.state = CLOSED
+        self.opened_at: Optional[float] = None
+        self._calls = deque(maxlen=BREAKER_WINDOW)  # (ok, latency)
+        self._probe_in_flight = False
+        self.total_calls = 0
+        self.rejected_calls = 0
+
+    def allow_request(self) -> bool:
+        if self.state == OPEN and time.monotonic() - self.opened_at >= BREAKER_COOLDOWN:
+            self.state = HALF_OPEN
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.rejected_calls += 1
+        return False
+
+    def release(self) -> None:
+        """The allowed call ended without an outcome (cancelled because another provider won)"""
+        self._probe_in_flight = False
+
+    def record(self, ok: bool, latency: float) -> None:
+        self.total_calls += 1
+        self._calls.append((ok, latency))
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = False
+            if ok and latency < self.slow_call_threshold:
+                # Start the new window from the successful probe only
+                self.state = CLOSED
+                self._calls.clear()
+                self._calls.append((ok, latency))
+            else:
+                self._open()
+        elif self.state == CLOSED and self._should_open():
+            self._open()
+
+    def _should_open(self) -> bool:
+        if len(self._calls) < BREAKER_MIN_CALLS:
+            return False
+        failures = sum(1 for ok, _ in self._calls if not ok)
+        slow = sum(1 for _, latency in self._calls if latency >= self.slow_call_threshold)
+        return (
+            failures / len(self._calls) >= BREAKER_FAILURE_RATE
+            or slow / len(self._calls) >= BREAKER_SLOW_CALL_RATE
+        )
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        print(f" ISBN provider circuit opened: {self.name}")
+
+    def stats(self) -> Dict[str, Any]:
+        calls = list(self._calls)
+        latencies = [latency for _, latency in calls]
+        p50 = _percentile(latencies, 50)
+        p95 = _percentile(latencies, 95)
+        retry_in = None
+        if self.state == OPEN:
+            retry_in = round(max(0.0, BREAKER_COOLDOWN - (time.monotonic() - self.opened_at)), 1)
+        return {
+            "provider": self.name,
+            "state": self.state,
+            "window_calls": len(calls),
+            "success_rate": round(sum(1 for ok, _ in calls if ok) / len(calls), 3) if calls else None,
+            "latency_p50_ms": round(p50 * 1000) if p50 is not None else None,
+            "latency_p95_ms": round(p95 * 1000) if p95 is not None else None,
+            "total_calls": self.total_calls,
+            "rejected_calls": self.rejected_calls,
+            "retry_in_seconds": retry_in,
+        }
+
+
+provider_breakers = {
+    name: ProviderCircuitBreaker(name, deadline * BREAKER_SLOW_CALL_RATIO)
+    for name, deadline in PROVIDER_DEADLINES.items()
+}
+
+
+def get_provider_health() -> List[Dict[str, Any]]:
+    """Breaker state, success rate and latency percentiles of every ISBN provider"""
+    return [breaker.stats() for breaker in provider_breakers.values()]
+
+
+# Ordre = priorite lors de la fusion champ par champ
+ISBN_PROVIDERS = [
+    ("openlibrary", fetch_book_from_openlibrary),
+    ("google_books", fetch_book_from_google_books),
+    ("babelio", scrape_book_from_babelio),
+]
+
+
+def _is_missing(field: str, value: Any) -> bool:
+    return value in (None, "", []) or PLACEHOLDER_VALUES.get(field) == value
+
+
+def is_complete_record(book_info: Dict[str, Any]) -> bool:
+    return all(not _is_missing(field, book_info.get(field)) for field in COMPLETE_FIELDS)
+
+
+def merge_book_records(isbn: str, records: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Merge provider records field by field, in ISBN_PROVIDERS priority order.
+
+    The "provider" key lists the providers that contributed at least one field
+    (e.g. "openlibrary+babelio").
+    """
+    ordered = [(name, records[name]) for name, _ in ISBN_PROVIDERS if name in records]
+    if not ordered:
+        return None
+
+    merged: Dict[str, Any] = {"isbn": isbn}
+    contributors: List[str] = []
+    for field in MERGED_FIELDS:
+        fallback = None
+        for name, record in ordered:
+            value = record.get(field)
+            if not _is_missing(field, value):
+                merged[field] = value
+                if name not in contributors:
+                    contributors.append(name)
+                break
+            if value is not None and fallback is None:
+                fallback = value
+        else:
+            if fallback is not None:
+                merged[field] = fallback
+
+    if _is_missing("title", merged.get("title")):
+        return None
+    merged["provider"] = "+".join(contributors)
+    return merged
+
+
+async def call_provider(name: str, call: Awaitable[Any]) -> Any:
+    """Await a provider call under its deadline and circuit breaker"""
+    breaker = provider_breakers[name]
+    if not breaker.allow_request():
+        if asyncio.iscoroutine(call):
+            call.close()
+        raise IsbnProviderError(f"{name}: circuit open")
+
+    started = time.monotonic()
+    try:
+        book_info = await asyncio.wait_for(call, timeout=PROVIDER_DEADLINES[name])
+    except asyncio.TimeoutError:
+        breaker.record(False, time.monotonic() - started)
+        raise IsbnProviderError(f"{name}: no answer after {PROVIDER_DEADLINES[name]}s")
+    except IsbnProviderError:
+        breaker.record(False, time.monotonic() - started)
+        raise
+    except Exception as e:
+        # Transport or parsing error (httpx, unexpected payload...): a failed call as well
+        breaker.record(False, time.monotonic() - started)
+        raise IsbnProviderError(f"{name}: {type(e).__name__}: {e}") from e
+    finally:
+        # A half-open probe never stays in flight, whatever ended the call (cancellation included)
+        breaker.release()
+    breaker.record(True, time.monotonic() - started)
+    return book_info
+
+
+async def fetch_book_by_isbn_scraping(
+    isbn: str,
+    raise_on_error: bool = False,
+    known_records: Optional[Dict[str, Optional[Dict[str, Any]]]] = None
+) -> Optional[Dict[str, Any]]:
     """
     Combined ISBN lookup using API and Web Scraping
     This replaces the Google Books API service.
+
+    OpenLibrary, Google Books and Babelio are queried concurrently, each with its own
+    deadline; providers whose circuit is open are skipped. The first complete record
+    wins and the other requests are cancelled; otherwise the partial records are
+    merged field by field once every provider answered.
+
+    Returns None when no provider knows the ISBN. If a provider was unreachable
+    and raise_on_error is set, IsbnProviderError is raised instead, so callers
+    can tell "not found" from "could not check" (e.g. to avoid caching the miss).
+
+    known_records holds answers already obtained elsewhere ({provider: record or None},
+    e.g. from a batch OpenLibrary call): those providers are not queried again.
     """
-    # 1. Try OpenLibrary (Reliable API)
-    book_info = await fetch_book_from_openlibrary(isbn)
-    if book_info:
-        return book_info
-    
-    # 2. Try Babelio (Web Scraping)
-    book_info = await scrape_book_from_babelio(isbn)
-    if book_info:
-        return book_info
-    
+    known_records = known_records or {}
+    records: Dict[str, Dict[str, Any]] = {
+        name: record for name, record in known_records.items() if record
+    }
+    merged = merge_book_records(isbn, records)
+    if merged and is_complete_record(merged):
+        return merged
+
+    tasks = {
+        asyncio.ensure_future(call_provider(name, fetch(isbn))): name
+        for name, fetch in ISBN_PROVIDERS
+        if name not in known_records
+    }
+    errors = []
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = tasks[task]
+                try:
+                    book_info = task.result()
+                except IsbnProviderError as e:
+                    print(f" ISBN provider unavailable: {e}")
+                    errors.append(str(e))
+                    continue
+                if book_info:
+                    records[name] = book_info
+
+            merged = merge_book_records(isbn, records)
+            if merged and is_complete_record(merged):
+                return merged
+    finally:
+        for task in pending:
+            task.cancel()
+
+    merged = merge_book_records(isbn, records)
+    if merged:
+        return merged
+
+    if errors and raise_on_error:
+        raise IsbnProviderError("; ".join(errors))
     return None
@@ -0,0 +1,290 @@
+# app/services/search.py
+
+import re
+import math
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import inspect, text, func, literal_column, case, Integer, Float
+from sqlalchemy.orm import Session
+from app.models.book import Announcement, Book
+
+# Configuration créée par migration_fulltext_search.sql (french + unaccent)
+POSTGRES_SEARCH_CONFIG = "public.french_unaccent"
+
+# Poids bm25 des colonnes de books_fts : title, authors, subtitle, isbn
+SQLITE_FTS_WEIGHTS = "10.0, 5.0, 2.0, 10.0"
+
+SQLITE_FTS_SETUP = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+        title, authors, subtitle, isbn,
+        content='books', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts(rowid, title, authors, subtitle, isbn)
+        VALUES (new.id, new.title, new.authors, new.subtitle, new.isbn);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, authors, subtitle, isbn)
+        VALUES ('delete', old.id, old.title, old.authors, old.subtitle, old.isbn);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, authors, subtitle, isbn)
+        VALUES ('delete', old.id, old.title, old.authors, old.subtitle, old.isbn);
+        INSERT INTO books_fts(rowid, title, authors, subtitle, isbn)
+        VALUES (new.id, new.title, new.authors, new.subtitle, new.isbn);
+    END
+    """,
+]
+
+# Backend détecté par URL de base de données : "postgres", "sqlite_fts" ou "like"
+_backends: Dict[str, str] = {}
+
+# Backend fuzzy détecté par URL : "pg_trgm" ou "python"
+_fuzzy_backends: Dict[str, str] = {}
+
+# Nombre maximum de livres candidats retournés par l'index trigrammes Python
+FUZZY_MAX_CANDIDATES = 500
+
+
+def tokenize_search(term: str) -> List[str]:
+    """Split a user query into word tokens (letters/digits only, safe to embed in a match expression)"""
+    return re.findall(r"\w+", term or "", re.UNICODE)
+
+
+def ensure_sqlite_fts(bind) -> None:
+    """Create the FTS5 mirror of books and its sync triggers, populating it on first creation"""
+    with bind.begin() as connection:
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'")
+        ).first()
+        for statement in SQLITE_FTS_SETUP:
+            connection.execute(text(statement))
+        if not exists:
+            connection.execute(text("INSERT INTO books_fts(books_fts) VALUES ('rebuild')"))
+
+
+def _detect_backend(bind) -> str:
+    try:
+        if bind.dialect.name == "postgresql":
+            columns = {column["name"] for column in inspect(bind).get_columns("books")}
+            return "postgres" if "search_vector" in columns else "like"
+        if bind.dialect.name == "sqlite":
+            ensure_sqlite_fts(bind)
+            return "sqlite_fts"
+    except Exception as e:
+        print(f" Full-text search unavailable, falling back to LIKE: {e}")
+    return "like"
+
+
+def get_search_backend(db: Session) -> str:
+    """Return the search backend available for this database (detected once per process)"""
+    bind = db.get_bind()
+    key = str(bind.url)
+    if key not in _backends:
+        _backends[key] = _detect_backend(bind)
+    return _backends[key]
+
+
+def _apply_like_search(query, term: str):
+    search_pattern = f"%{term}%"
+    return query.join(Book).filter(
+        (Book.title.like(search_pattern)) |
+        (Book.authors.like(search_pattern)) |
+        (Book.isbn.like(search_pattern))
+    ), None
+
+
+def apply_book_search(query, db: Session, term: str) -> Tuple[object, Optional[object]]:
+    """
+    Restrict an Announcement query to announcements whose book matches `term`.
+
+    Returns (query, rank_order): rank_order is an ORDER BY expression putting the most
+    relevant books first, or None when no relevance ranking is available. Every word of
+    the query must match (as a prefix, so partial words typed in a search box still hit).
+    """
+    tokens = tokenize_search(term)
+    backend = get_search_backend(db)
+
+    if not tokens or backend == "like":
+        return _apply_like_search(query, term)
+
+    if backend == "postgres":
+        search_vector = literal_column("books.search_vector")
+        ts_query = func.to_tsquery(
+            literal_column(f"'{POSTGRES_SEARCH_CONFIG}'::regconfig"),
+            " & ".join(f"{token}:*" for token in tokens)
+        )
+        query = query.join(Book).filter(search_vector.op("@@")(ts_query))
+        return query, func.ts_rank_cd(search_vector, ts_query).desc()
+
+    # SQLite FTS5 (développement local)
+    match_expression = " ".join(f'"{token}"*' for token in tokens)
+    matches = text(
+        f"SELECT rowid AS book_id, bm25(books_fts, {SQLITE_FTS_WEIGHTS}) AS score "
+        "FROM books_fts WHERE books_fts MATCH :match_expression"
+    ).bindparams(match_expression=match_expression).columns(
+        book_id=Integer, score=Float
+    ).subquery("book_matches")
+
+    query = query.join(matches, matches.c.book_id == Announcement.book_id)
+    # bm25() is lower for better matches
+    return query, matches.c.score.asc()
+
+
+# ============================================
+# FUZZY (TRIGRAM) SEARCH
+# ============================================
+
+def normalize_for_trigrams(value: str) -> str:
+    """Lowercase, strip accents and keep only word characters (as pg_trgm does)"""
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    without_accents = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(tokenize_search(without_accents.lower()))
+
+
+def trigrams(value: str) -> Set[str]:
+    """pg_trgm-compatible trigram set: each word is padded with two leading spaces and one trailing"""
+    result = set()
+    for word in normalize_for_trigrams(value).split():
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            result.add(padded[i:i + 3])
+    return result
+
+
+class TrigramIndex:
+    """
+    In-memory inverted index trigram -> book ids, used when pg_trgm is not available (SQLite).
+
+    Lookups only touch the posting lists of the query's trigrams, never every book.
+    The index is rebuilt when the books table signature (count, max id) changes or
+    when invalidate() is called after a book edit.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._signature = None
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._book_trigrams: Dict[int, Tuple[Set[str], Set[str]]] = {}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._signature = None
+
+    def _refresh(self, db: Session) -> None:
+        signature = tuple(db.execute(text("SELECT count(*), max(id) FROM books")).first())
+        if signature == self._signature:
+            return
+
+        postings = defaultdict(set)
+        book_trigrams = {}
+        for book_id, title, authors in db.execute(text("SELECT id, title, authors FROM books")):
+            title_trigrams = trigrams(title)
+            author_trigrams = trigrams(authors)
+            book_trigrams[book_id] = (title_trigrams, author_trigrams)
+            for trigram in title_trigrams | author_trigrams:
+                postings[trigram].add(book_id)
+
+        self._postings = postings
+        self._book_trigrams = book_trigrams
+        self._signature = signature
+
+    def search(self, db: Session, term: str, min_similarity: float) -> Dict[int, float]:
+        """
+        Return {book_id: score} for books whose title or authors contain the query's words
+        approximately. The score is the share of query trigrams found (like word_similarity).
+        """
+        query_trigrams = trigrams(term)
+        if not query_trigrams:
+            return {}
+
+        with self._lock:
+            self._refresh(db)
+
+            # A book needs at least this many shared trigrams to reach the threshold
+            required = max(1, math.ceil(min_similarity * len(query_trigrams)))
+            hits: Dict[int, int] = defaultdict(int)
+            for trigram in query_trigrams:
+                for book_id in self._postings.get(trigram, ()):
+                    hits[book_id] += 1
+
+            scores = {}
+            for book_id, count in hits.items():
+                if count < required:
+                    continue
+                title_trigrams, author_trigrams = self._book_trigrams[book_id]
+                score = max(
+                    len(query_trigrams & title_trigrams),
+                    len(query_trigrams & author_trigrams)
+                ) / len(query_trigrams)
+                if score >= min_similarity:
+                    scores[book_id] = score
+
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:FUZZY_MAX_CANDIDATES]
+        return dict(best)
+
+
+trigram_index = TrigramIndex()
+
+
+def _detect_fuzzy_backend(bind) -> str:
+    if bind.dialect.name == "postgresql":
+        try:
+            with bind.connect() as connection:
+                installed = connection.execute(
+                    text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                ).first()
+            if installed:
+                return "pg_trgm"
+        except Exception as e:
+            print(f" pg_trgm unavailable, using in-process trigram index: {e}")
+    return "python"
+
+
+def get_fuzzy_backend(db: Session) -> str:
+    """Return the fuzzy search backend available for this database (detected once per process)"""
+    bind = db.get_bind()
+    key = str(bind.url)
+    if key not in _fuzzy_backends:
+        _fuzzy_backends[key] = _detect_fuzzy_backend(bind)
+    return _fuzzy_backends[key]
+
+
+def apply_fuzzy_book_search(query, db: Session, term: str, min_similarity: float) -> Tuple[object, Optional[object]]:
+    """
+    Typo-tolerant variant of apply_book_search based on trigram similarity of title/authors.
+
+    Returns (query, rank_order) like apply_book_search.
+    """
+    if get_fuzzy_backend(db) == "pg_trgm":
+        # <% is answered by the gin_trgm_ops indexes; its threshold is a (transaction-local) setting
+        db.execute(
+            text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+            {"threshold": str(min_similarity)}
+        )
+        query = query.join(Book).filter(
+            Book.title.op("%>")(term) | Book.authors.op("%>")(term)
+        )
+        score = func.greatest(
+            func.word_similarity(term, Book.title),
+            func.word_similarity(term, func.coalesce(Book.authors, ""))
+        )
+        return query, score.desc()
+
+    scores = trigram_index.search(db, term, min_similarity)
+    if not scores:
+        return query.filter(Announcement.book_id.in_([])), None
+
+    query = query.filter(Announcement.book_id.in_(list(scores)))
+    score = case(scores, value=Announcement.book_id, else_=0.0)
+    return query, score.desc()
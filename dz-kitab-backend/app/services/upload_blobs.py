@@ -0,0 +1,120 @@
+# app/services/upload_blobs.py
+
+import json
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import update, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.singleflight import SingleFlight
+from app.models.upload_blob import UploadBlob
+
+# Concurrent uploads of the same content in this worker share one processing run
+upload_processing = SingleFlight()
+
+
+def blob_metadata(blob: UploadBlob) -> Dict[str, Any]:
+    """Stored result of the processing stage (same shape as image_variants.render_variants)"""
+    return {
+        "size": blob.size,
+        "width": blob.width,
+        "height": blob.height,
+        "variants": json.loads(blob.variants) if blob.variants else [],
+    }
+
+
+def acquire_existing_blob(db: Session, digest: str) -> Optional[Dict[str, Any]]:
+    """
+    Add a reference to already stored content and return its metadata, or None when the
+    content is not stored. The increment waits on a release in progress (row lock), and
+    a row whose last reference is being deleted is not reused: its files are going away.
+    """
+    result = db.execute(
+        update(UploadBlob)
+        .where(UploadBlob.digest == digest, UploadBlob.ref_count > 0)
+        .values(ref_count=UploadBlob.ref_count + 1)
+    )
+    if not result.rowcount:
+        db.rollback()
+        return None
+    metadata = blob_metadata(db.get(UploadBlob, digest))
+    db.commit()
+    return metadata
+
+
+def acquire_blob(db: Session, digest: str, filename: str, processed: Dict[str, Any]) -> None:
+    """Add a reference to a freshly published upload, creating its row on the first upload"""
+    result = db.execute(
+        update(UploadBlob)
+        .where(UploadBlob.digest == digest)
+        .values(ref_count=UploadBlob.ref_count + 1)
+    )
+    if result.rowcount:
+        db.commit()
+        return
+
+    try:
+        db.add(UploadBlob(
+            digest=digest,
+            filename=filename,
+            size=processed["size"],
+            width=processed["width"],
+            height=processed["height"],
+            variants=json.dumps(processed["variants"]),
+            ref_count=1
+        ))
+        db.commit()
+    except IntegrityError:
+        # Same content registered concurrently by another worker
+        db.rollback()
+        db.execute(
+            update(UploadBlob)
+            .where(UploadBlob.digest == digest)
+            .values(ref_count=UploadBlob.ref_count + 1)
+        )
+        db.commit()
+
+
+def release_blob(db: Session, filename: str, delete_files: Callable[[str], None]) -> Optional[bool]:
+    """
+    Remove a reference to a stored upload, and delete its files with the last one.
+
+    The row stays locked (SELECT ... FOR UPDATE) from the decrement until it is deleted,
+    and delete_files(filename) runs in between: a concurrent upload of the same content
+    waits in acquire_existing_blob, then finds no row and publishes the files again,
+    instead of taking a reference to files that are being deleted. If delete_files
+    fails, the reference is kept.
+
+    Returns True when the content was deleted, False when other references remain, and
+    None for files without a row (uploads made before content addressing, deleted
+    directly as before).
+    """
+    blob = (
+        db.query(UploadBlob)
+        .filter(UploadBlob.filename == filename, UploadBlob.ref_count > 0)
+        .with_for_update()
+        .first()
+    )
+    if blob is None:
+        db.rollback()
+        return None
+
+    db.execute(
+        update(UploadBlob)
+        .where(UploadBlob.digest == blob.digest)
+        .values(ref_count=UploadBlob.ref_count - 1)
+    )
+    db.refresh(blob)
+    if blob.ref_count > 0:
+        db.commit()
+        return False
+
+    try:
+        delete_files(filename)
+    except Exception:
+        db.rollback()
+        raise
+    db.execute(delete(UploadBlob).where(UploadBlob.digest == blob.digest, UploadBlob.ref_count <= 0))
+    db.commit()
+    return True
@@ -0,0 +1,118 @@
+# app/services/view_counter.py
+
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, Optional
+
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, IS_VERCEL
+from app.models.book import Announcement
+from app.core.cache import response_cache, ANNOUNCEMENTS_NAMESPACE
+
+# Intervalle de flush des vues vers la base (secondes)
+VIEW_FLUSH_INTERVAL = float(os.getenv("VIEW_FLUSH_INTERVAL", "10"))
+# Flush anticipé dès que ce nombre de vues est en attente.
+# Sur Vercel il n'y a pas de processus persistant : on écrit immédiatement.
+VIEW_FLUSH_MAX_PENDING = int(os.getenv("VIEW_FLUSH_MAX_PENDING", "1" if IS_VERCEL else "1000"))
+
+
+class ViewCounter:
+    """
+    In-process buffer of announcement views.
+
+    GET /announcements/{id} only records the view in memory; a background thread
+    periodically writes all pending views as one batched
+    UPDATE announcements SET views_count = views_count + n per announcement.
+    """
+
+    def __init__(self, interval: float = VIEW_FLUSH_INTERVAL, max_pending: int = VIEW_FLUSH_MAX_PENDING):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending: Dict[int, int] = defaultdict(int)
+        self._pending_total = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, announcement_id: int) -> None:
+        """Count one view (no database access unless the buffer is full)"""
+        with self._lock:
+            self._pending[announcement_id] += 1
+            self._pending_total += 1
+            should_flush = self._pending_total >= self.max_pending
+        if should_flush:
+            self.flush()
+
+    def pending(self, announcement_id: int) -> int:
+        """Views recorded by this process and not yet written to the database"""
+        with self._lock:
+            return self._pending.get(announcement_id, 0)
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """Write pending views to the database; returns the number of announcements updated"""
+        with self._flush_lock:
+            with self._lock:
+                batch = dict(self._pending)
+                self._pending.clear()
+                self._pending_total = 0
+            if not batch:
+                return 0
+
+            session = db or SessionLocal()
+            try:
+                statement = update(Announcement).where(
+                    Announcement.id == bindparam("announcement_id")
+                ).values(
+                    views_count=func.coalesce(Announcement.views_count, 0) + bindparam("increment"),
+                    # A view is not an edit: keep updated_at (and the ETags built on it) unchanged
+                    updated_at=Announcement.updated_at
+                )
+                session.connection().execute(statement, [
+                    {"announcement_id": announcement_id, "increment": increment}
+                    for announcement_id, increment in batch.items()
+                ])
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                print(f" Error flushing view counts: {e}")
+                # Keep the views for the next flush
+                with self._lock:
+                    for announcement_id, increment in batch.items():
+                        self._pending[announcement_id] += increment
+                        self._pending_total += increment
+                return 0
+            finally:
+                if db is None:
+                    session.close()
+
+        # Cached detail bodies hold the old count: drop them so the next read is exact
+        for announcement_id in batch:
+            response_cache.delete(ANNOUNCEMENTS_NAMESPACE, {"endpoint": "detail", "id": announcement_id})
+        return len(batch)
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.flush()
+
+    def start(self) -> None:
+        """Start the periodic flush thread (application startup)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="view-counter-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the flush thread and write everything still pending (application shutdown)"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval)
+            self._thread = None
+        self.flush()
+
+
+view_counter = ViewCounter()
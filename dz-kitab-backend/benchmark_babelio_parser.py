@@ -0,0 +1,143 @@
+# benchmark_babelio_parser.py
+"""
+Compare the Babelio page parsers: parse time and memory allocated per page.
+
+    python benchmark_babelio_parser.py                       # saved pages in benchmarks/babelio_pages/
+    python benchmark_babelio_parser.py page1.html page2.html
+    python benchmark_babelio_parser.py --save 9782070612758  # download a page into benchmarks/babelio_pages/
+
+"legacy" is the previous implementation (full html.parser tree + get_text() of the whole
+page); the others are the backends of app/services/babelio_parser.py that are installed
+(pip install selectolax lxml to compare all of them).
+Without any saved page, a synthetic page of similar size is generated.
+"""
+import argparse
+import asyncio
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add project root to sys.path
+BASE_DIR = Path(__file__).resolve().parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from bs4 import BeautifulSoup
+from app.services.babelio_parser import BACKENDS, parse_babelio_page
+
+PAGES_DIR = BASE_DIR / "benchmarks" / "babelio_pages"
+
+
+def legacy_parse(html: str, isbn: str):
+    """The pre-backend scraper: whole-page tree and whole-page text regexes"""
+    soup = BeautifulSoup(html, 'html.parser')
+    title_tag = soup.select_one('h1[itemprop="name"]')
+    if not title_tag:
+        return None
+    author_tag = soup.select_one('span[itemprop="author"] a')
+    desc_tag = soup.select_one('div#un_resume')
+    img_tag = soup.select_one('img[itemprop="image"]')
+    details_text = soup.get_text()
+    page_match = re.search(r'(\d+)\s+pages', details_text)
+    publisher_match = re.search(r'Editeur\s+:\s+([^\n]+)', details_text)
+    return {
+        "isbn": isbn,
+        "title": title_tag.get_text(strip=True),
+        "authors": [author_tag.get_text(strip=True)] if author_tag else ["Auteur Inconnu"],
+        "description": desc_tag.get_text(strip=True) if desc_tag else None,
+        "cover_image_url": img_tag['src'] if img_tag else None,
+        "page_count": int(page_match.group(1)) if page_match else None,
+        "publisher": publisher_match.group(1).strip() if publisher_match else None,
+    }
+
+
+def synthetic_page() -> str:
+    """Book page with Babelio's markup for the parsed fields, padded with navigation and reviews"""
+    nav = "".join(f'<li><a href="/liste/{i}">Liste {i}</a></li>' for i in range(300))
+    reviews = "".join(
+        f'<div class="post_con"><p class="text">Critique {i} : {"tres bon livre, " * 40}</p>'
+        f'<span class="grey">{i} commentaires</span></div>'
+        for i in range(200)
+    )
+    return f"""<!DOCTYPE html><html><head><title>Le Petit Prince - Babelio</title>
+<script>{"var x = 1;" * 2000}</script></head><body>
+<nav><ul>{nav}</ul></nav>
+<div class="col col-8" itemscope itemtype="https://schema.org/Book">
+  <h1 itemprop="name"><a href="/livres/x">Le Petit Prince</a></h1>
+  <span itemprop="author" itemscope><a href="/auteur/1"><span itemprop="name">Antoine de Saint-Exupery</span></a></span>
+  <img itemprop="image" src="https://www.babelio.com/couv/CVT_Le-Petit-Prince_1234.jpg">
+  <div class="livre_refs grey_light">EAN : 9782070612758<br>96 pages<br>Editeur : Gallimard Jeunesse (04/03/2007)</div>
+  <div id="un_resume" class="livre_resume">{"Le premier soir je me suis donc endormi sur le sable. " * 30}</div>
+</div>
+<div class="reviews">{reviews}</div>
+<footer>{nav}</footer></body></html>"""
+
+
+def measure(parse, html: str, repeat: int):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parse(html)
+        times.append(time.perf_counter() - started)
+    tracemalloc.start()
+    parse(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+async def save_page(isbn: str) -> None:
+    from app.core.http_clients import http_clients
+    from app.services.isbn_scraper import HEADERS
+
+    PAGES_DIR.mkdir(parents=True, exist_ok=True)
+    response = await http_clients.get("babelio").get("/resrecherche.php", params={"search": isbn}, headers=HEADERS)
+    path = PAGES_DIR / f"{isbn}.html"
+    path.write_text(response.text, encoding="utf-8")
+    await http_clients.aclose()
+    print(f"Saved {path} ({len(response.text)} chars, HTTP {response.status_code})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Babelio page parsers")
+    parser.add_argument("pages", nargs="*", help="Saved Babelio pages (default: benchmarks/babelio_pages/*.html)")
+    parser.add_argument("--repeat", type=int, default=20, help="Parses per page and parser (default: 20)")
+    parser.add_argument("--save", metavar="ISBN", nargs="+", help="Download Babelio pages for these ISBNs and exit")
+    args = parser.parse_args()
+
+    if args.save:
+        for isbn in args.save:
+            asyncio.run(save_page(isbn))
+        return
+
+    paths = [Path(p) for p in args.pages] or sorted(PAGES_DIR.glob("*.html"))
+    pages = [(path.name, path.read_text(encoding="utf-8", errors="replace")) for path in paths]
+    if not pages:
+        print("No saved page, using a synthetic one (see --save)")
+        pages = [("synthetic.html", synthetic_page())]
+
+    parsers = [("legacy", legacy_parse)]
+    for name, backend_class in BACKENDS.items():
+        try:
+            backend = backend_class()
+        except ImportError:
+            print(f"{name}: not installed, skipped")
+            continue
+        parsers.append((name, lambda html, isbn, backend=backend: parse_babelio_page(html, isbn, backend)))
+
+    for page_name, html in pages:
+        print(f"\n{page_name} ({len(html) // 1024} KB)")
+        print(f"  {'parser':<12}{'median ms':>12}{'peak alloc KB':>16}  result")
+        for name, parse in parsers:
+            isbn = page_name.split(".")[0]
+            median, peak = measure(lambda page: parse(page, isbn), html, args.repeat)
+            result = parse(html, isbn) or {}
+            summary = f"{result.get('title')!r}, {result.get('page_count')} p., {result.get('publisher')!r}"
+            print(f"  {name:<12}{median * 1000:>12.2f}{peak / 1024:>16.0f}  {summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# explain_queries.py
+"""
+Print the query plans of the main announcement queries.
+
+Run it before and after `alembic upgrade head` (migration d1f07fe12e79) and diff the output:
+
+    python explain_queries.py > plans_before.txt
+    alembic upgrade head
+    python explain_queries.py > plans_after.txt
+
+On PostgreSQL, --analyze runs EXPLAIN (ANALYZE, BUFFERS) and therefore executes the queries.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to sys.path
+BASE_DIR = Path(__file__).resolve().parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from sqlalchemy import func, text
+from app.database import SessionLocal, engine
+from app import models  # noqa: F401  (registers all mappers)
+from app.models.book import Announcement, Book, AnnouncementStatusEnum, BookCategoryEnum
+
+
+def main_queries(db, user_id: int):
+    """(label, query) pairs mirroring the router queries"""
+    active = AnnouncementStatusEnum.ACTIVE
+    category = BookCategoryEnum.INFORMATIQUE
+    return [
+        (
+            "books.get_announcements (status + category, newest first)",
+            db.query(Announcement)
+            .filter(Announcement.status == active, Announcement.category == category)
+            .order_by(Announcement.created_at.desc(), Announcement.id.desc())
+            .limit(20)
+        ),
+        (
+            "books.get_announcements (cursor mode, no filter)",
+            db.query(Announcement)
+            .order_by(Announcement.created_at.desc(), Announcement.id.desc())
+            .limit(21)
+        ),
+        (
+            "books.get_announcements (total count with status filter)",
+            db.query(func.count(Announcement.id)).filter(Announcement.status == active)
+        ),
+        (
+            "books.get_my_announcements",
+            db.query(Announcement).filter(Announcement.user_id == user_id)
+        ),
+        (
+            "recommendations.get_same_domain_recommendations",
+            db.query(Announcement)
+            .filter(
+                Announcement.category == category,
+                Announcement.id != 1,
+                Announcement.status == active
+            )
+            .order_by(Announcement.created_at.desc())
+            .limit(4)
+        ),
+        (
+            "dashboard.get_dashboard_overview (active listings of a seller)",
+            db.query(func.count(Announcement.id)).filter(
+                Announcement.user_id == user_id,
+                Announcement.status == active
+            )
+        ),
+        (
+            "admin.get_popular_books (announcements per book)",
+            db.query(Book.id, Book.title, func.count(Announcement.id))
+            .join(Announcement, Book.id == Announcement.book_id)
+            .group_by(Book.id, Book.title)
+            .order_by(func.count(Announcement.id).desc())
+            .limit(10)
+        ),
+    ]
+
+
+def explain(db, query, analyze: bool) -> str:
+    sql = str(query.statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    if engine.dialect.name == "postgresql":
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+        rows = db.execute(text(prefix + sql)).fetchall()
+        return "\n".join(row[0] for row in rows)
+    rows = db.execute(text("EXPLAIN QUERY PLAN " + sql)).fetchall()
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Print EXPLAIN plans of the announcement queries")
+    parser.add_argument("--analyze", action="store_true", help="PostgreSQL only: EXPLAIN ANALYZE")
+    parser.add_argument("--user-id", type=int, default=1, help="Seller used for per-user queries")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(f"Database: {engine.dialect.name}")
+        for label, query in main_queries(db, args.user_id):
+            print(f"\n=== {label} ===")
+            print(explain(db, query, args.analyze))
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    run()
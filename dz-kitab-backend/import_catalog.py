@@ -0,0 +1,356 @@
+# import_catalog.py
+"""
+Bulk import book metadata from an offline catalog dump into `books`.
+
+Supported inputs (optionally gzip-compressed, detected from the extension or --format):
+  - OpenLibrary editions dump (ol_dump_editions_*.txt[.gz]): type, key, revision, last_modified, JSON
+  - JSONL: one object per line with Book column names (isbn, title, authors, ...)
+  - CSV: header row with Book column names
+
+Examples:
+
+    python import_catalog.py ol_dump_editions_latest.txt.gz --language fr --isbn-prefix 9782
+    python import_catalog.py manuels.csv --overwrite
+
+The file is streamed and written in batches (COPY + INSERT ... ON CONFLICT on PostgreSQL,
+executemany on SQLite), so memory stays bounded by --batch-size whatever the dump size.
+After each committed batch the input offset is saved to a checkpoint file; re-running the
+same command resumes from there (--restart ignores it).
+
+Existing books are kept: only their empty columns are filled, unless --overwrite is given.
+Imported ISBNs are then answered from `books` instead of OpenLibrary/Babelio.
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# Add project root to sys.path
+BASE_DIR = Path(__file__).resolve().parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from sqlalchemy import text
+from app.database import engine
+
+BOOK_COLUMNS = [
+    "isbn", "title", "subtitle", "authors", "publisher", "published_date", "description",
+    "page_count", "categories", "language", "cover_image_url", "preview_link", "info_link",
+]
+
+# OpenLibrary utilise des codes MARC (ISO 639-2/B), les livres stockent des codes ISO 639-1
+OPENLIBRARY_LANGUAGES = {
+    "fre": "fr", "fra": "fr", "eng": "en", "ara": "ar", "ger": "de", "deu": "de",
+    "spa": "es", "ita": "it", "por": "pt", "ber": "ber", "kab": "kab",
+}
+
+OPENLIBRARY_COVER_URL = "https://covers.openlibrary.org/b/id/{}-L.jpg"
+
+
+# ============================================
+# READING
+# ============================================
+
+class LineReader:
+    """Iterates the decoded lines of a (possibly gzipped) file, tracking the byte offset consumed"""
+
+    def __init__(self, path: str, offset: int = 0):
+        self.path = path
+        self._raw = gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+        self.offset = 0
+        if offset:
+            self._raw.seek(offset)
+            self.offset = offset
+
+    def __iter__(self) -> Iterator[str]:
+        for raw in self._raw:
+            self.offset += len(raw)
+            yield raw.decode("utf-8", errors="replace")
+
+    def readline(self) -> str:
+        raw = self._raw.readline()
+        self.offset += len(raw)
+        return raw.decode("utf-8", errors="replace")
+
+    def close(self) -> None:
+        self._raw.close()
+
+
+def detect_format(path: str) -> str:
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    if name.endswith(".csv"):
+        return "csv"
+    return "openlibrary"
+
+
+def normalize_isbn(value: Any) -> Optional[str]:
+    if not value:
+        return None
+    isbn = str(value).replace("-", "").replace(" ", "").strip()
+    return isbn or None
+
+
+def _join(value: Any) -> Optional[str]:
+    if isinstance(value, list):
+        return ", ".join(str(v) for v in value if v) or None
+    return value or None
+
+
+def _int(value: Any) -> Optional[int]:
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def book_from_openlibrary(edition: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Map an OpenLibrary edition record to Book columns"""
+    isbn = normalize_isbn((edition.get("isbn_13") or edition.get("isbn_10") or [None])[0])
+    if not isbn or not edition.get("title"):
+        return None
+
+    languages = [
+        OPENLIBRARY_LANGUAGES.get(lang.get("key", "").rsplit("/", 1)[-1], lang.get("key", "").rsplit("/", 1)[-1])
+        for lang in edition.get("languages", [])
+    ]
+    description = edition.get("description")
+    if isinstance(description, dict):
+        description = description.get("value")
+    covers = [cover for cover in edition.get("covers", []) if isinstance(cover, int) and cover > 0]
+    key = edition.get("key")
+
+    return {
+        "isbn": isbn,
+        "title": edition["title"],
+        "subtitle": edition.get("subtitle"),
+        "authors": edition.get("by_statement"),
+        "publisher": _join(edition.get("publishers")),
+        "published_date": edition.get("publish_date"),
+        "description": description,
+        "page_count": _int(edition.get("number_of_pages")),
+        "categories": _join(edition.get("subjects", [])[:3]),
+        "language": languages[0] if languages else None,
+        "cover_image_url": OPENLIBRARY_COVER_URL.format(covers[0]) if covers else None,
+        "preview_link": None,
+        "info_link": f"https://openlibrary.org{key}" if key else None,
+    }
+
+
+def book_from_catalog_row(row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Map a JSONL/CSV row (Book column names) to Book columns"""
+    isbn = normalize_isbn(row.get("isbn"))
+    if not isbn or not row.get("title"):
+        return None
+    book = {column: row.get(column) or None for column in BOOK_COLUMNS}
+    book["isbn"] = isbn
+    book["authors"] = _join(row.get("authors"))
+    book["categories"] = _join(row.get("categories"))
+    book["page_count"] = _int(row.get("page_count"))
+    return book
+
+
+def read_books(reader: LineReader, file_format: str, csv_header: Optional[List[str]]) -> Iterator[Dict[str, Any]]:
+    """Stream Book rows out of the input (invalid lines are skipped)"""
+    if file_format == "csv":
+        for row in csv.DictReader(reader, fieldnames=csv_header):
+            book = book_from_catalog_row(row)
+            if book:
+                yield book
+        return
+
+    for line in reader:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            if file_format == "openlibrary":
+                parts = line.split("\t")
+                if parts[0] != "/type/edition":
+                    continue
+                book = book_from_openlibrary(json.loads(parts[-1]))
+            else:
+                book = book_from_catalog_row(json.loads(line))
+        except (ValueError, IndexError):
+            continue
+        if book:
+            yield book
+
+
+# ============================================
+# WRITING
+# ============================================
+
+def upsert_sql(source: str, overwrite: bool) -> str:
+    """INSERT ... ON CONFLICT (isbn) DO UPDATE, from VALUES or from a staging SELECT"""
+    updated = [column for column in BOOK_COLUMNS if column != "isbn"]
+    if overwrite:
+        assignments = [f"{column} = COALESCE(excluded.{column}, books.{column})" for column in updated]
+    else:
+        assignments = [f"{column} = COALESCE(books.{column}, excluded.{column})" for column in updated]
+    return (
+        f"INSERT INTO books ({', '.join(BOOK_COLUMNS)}) {source} "
+        f"ON CONFLICT (isbn) DO UPDATE SET {', '.join(assignments)}"
+    )
+
+
+def write_batch_sqlite(connection, books: List[Dict[str, Any]], overwrite: bool) -> None:
+    values = f"VALUES ({', '.join(':' + column for column in BOOK_COLUMNS)})"
+    connection.execute(text(upsert_sql(values, overwrite)), books)
+
+
+def write_batch_postgres(connection, books: List[Dict[str, Any]], overwrite: bool) -> None:
+    """
+    COPY the batch into a temp staging table, then upsert it into books in one statement.
+
+    The staging table only has the imported columns and no defaults: COPY never calls
+    the books id sequence, id and timestamps are assigned by the INSERT ... SELECT.
+    """
+    connection.execute(text(
+        "CREATE TEMP TABLE IF NOT EXISTS books_import ON COMMIT DELETE ROWS AS "
+        f"SELECT {', '.join(BOOK_COLUMNS)} FROM books WITH NO DATA"
+    ))
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for book in books:
+        writer.writerow(["" if book[column] is None else book[column] for column in BOOK_COLUMNS])
+    buffer.seek(0)
+
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY books_import ({', '.join(BOOK_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+    select = f"SELECT {', '.join(BOOK_COLUMNS)} FROM books_import"
+    connection.execute(text(upsert_sql(select, overwrite)))
+
+
+# ============================================
+# CHECKPOINTS
+# ============================================
+
+def load_checkpoint(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: str, state: Dict[str, Any]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+# ============================================
+# MAIN
+# ============================================
+
+def keep(book: Dict[str, Any], languages: List[str], prefixes: List[str]) -> bool:
+    if languages and (book.get("language") or "") not in languages:
+        return False
+    if prefixes and not book["isbn"].startswith(tuple(prefixes)):
+        return False
+    return True
+
+
+def run_import(args) -> None:
+    file_format = args.format or detect_format(args.input)
+    checkpoint_path = args.checkpoint or f"{args.input}.checkpoint.json"
+    languages = [lang.strip() for lang in (args.language or "").split(",") if lang.strip()]
+    prefixes = [normalize_isbn(prefix) for prefix in (args.isbn_prefix or "").split(",") if prefix.strip()]
+
+    state = {} if args.restart else load_checkpoint(checkpoint_path)
+    if state and state.get("input") != os.path.abspath(args.input):
+        print(f"Checkpoint {checkpoint_path} belongs to another input, ignoring it")
+        state = {}
+    offset = state.get("offset", 0)
+    imported = state.get("imported", 0)
+    skipped = state.get("skipped", 0)
+
+    reader = LineReader(args.input)
+    csv_header = None
+    if file_format == "csv":
+        csv_header = next(csv.reader([reader.readline()]))
+    if offset > reader.offset:
+        reader.close()
+        reader = LineReader(args.input, offset)
+        print(f"Resuming {args.input} at byte {offset} ({imported} books already imported)")
+
+    dialect = engine.dialect.name
+    write_batch = write_batch_postgres if dialect == "postgresql" else write_batch_sqlite
+    print(f"Importing {args.input} ({file_format}) into {dialect}, batches of {args.batch_size}"
+          + (" (dry run)" if args.dry_run else ""))
+
+    started = time.monotonic()
+    resumed_from = imported
+    batch: Dict[str, Dict[str, Any]] = {}
+
+    def flush(connection) -> None:
+        nonlocal imported
+        if batch and not args.dry_run:
+            with connection.begin():
+                write_batch(connection, list(batch.values()), args.overwrite)
+        imported += len(batch)
+        batch.clear()
+        if not args.dry_run:
+            save_checkpoint(checkpoint_path, {
+                "input": os.path.abspath(args.input),
+                "offset": reader.offset,
+                "imported": imported,
+                "skipped": skipped,
+            })
+        rate = (imported - resumed_from) / max(time.monotonic() - started, 1e-6)
+        print(f"  {imported} books imported, {skipped} skipped (byte {reader.offset}, {rate:.0f} books/s)")
+
+    try:
+        with engine.connect() as connection:
+            for book in read_books(reader, file_format, csv_header):
+                if not keep(book, languages, prefixes):
+                    skipped += 1
+                    continue
+                book["language"] = book.get("language") or "fr"
+                # Same ISBN twice in a batch: the last one wins (ON CONFLICT cannot update a row twice)
+                batch[book["isbn"]] = book
+                if len(batch) >= args.batch_size:
+                    flush(connection)
+                if args.limit and imported + len(batch) >= args.limit:
+                    break
+            flush(connection)
+    finally:
+        reader.close()
+
+    print(f"Done: {imported} books imported, {skipped} skipped in {time.monotonic() - started:.1f}s")
+    if not args.dry_run and not args.limit and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import book metadata from a catalog dump into books")
+    parser.add_argument("input", help="OpenLibrary editions dump, JSONL or CSV file (.gz accepted)")
+    parser.add_argument("--format", choices=["openlibrary", "jsonl", "csv"], help="Input format (default: from the extension)")
+    parser.add_argument("--language", help="Keep only these languages, e.g. fr,en,ar")
+    parser.add_argument("--isbn-prefix", help="Keep only ISBNs starting with these prefixes, e.g. 9782,979-10")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Books per transaction (default: 5000)")
+    parser.add_argument("--limit", type=int, help="Stop after this many books")
+    parser.add_argument("--overwrite", action="store_true", help="Replace existing values instead of only filling empty columns")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <input>.checkpoint.json)")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start from the beginning")
+    parser.add_argument("--dry-run", action="store_true", help="Parse and filter only, write nothing")
+    run_import(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+-- migration_fulltext_search.sql
+
+-- 1. Extension unaccent (recherche insensible aux accents)
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- 2. Configuration de recherche "french_unaccent" : stemming français + suppression des accents
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'french_unaccent') THEN
+        CREATE TEXT SEARCH CONFIGURATION french_unaccent (COPY = french);
+        ALTER TEXT SEARCH CONFIGURATION french_unaccent
+            ALTER MAPPING FOR hword, hword_part, word
+            WITH unaccent, french_stem;
+    END IF;
+END $$;
+
+-- 3. Colonne tsvector maintenue par PostgreSQL (titre > auteurs > ISBN/sous-titre)
+ALTER TABLE books ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('public.french_unaccent', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('public.french_unaccent', coalesce(authors, '')), 'B') ||
+        setweight(to_tsvector('public.french_unaccent', coalesce(subtitle, '')), 'C') ||
+        setweight(to_tsvector('simple', coalesce(isbn, '')), 'A')
+    ) STORED;
+
+-- 4. Index GIN
+CREATE INDEX IF NOT EXISTS idx_books_search_vector ON books USING GIN (search_vector);
+
+SELECT '✅ Migration recherche plein texte terminée!' as message;
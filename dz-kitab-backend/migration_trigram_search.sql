@@ -0,0 +1,10 @@
+-- migration_trigram_search.sql
+
+-- 1. Extension pg_trgm (recherche tolérante aux fautes de frappe)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- 2. Index GIN trigrammes sur le titre et les auteurs
+CREATE INDEX IF NOT EXISTS idx_books_title_trgm ON books USING GIN (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_books_authors_trgm ON books USING GIN (authors gin_trgm_ops);
+
+SELECT '✅ Migration recherche trigrammes terminée!' as message;
@@ -11,6 +11,8 @@ echo "Syncing database schema..."
 python -c "from app.database import engine, Base; from app.models.user import User; from app.models.book import Book, Announcement; Base.metadata.create_all(bind=engine)"
 
 # Start Gunicorn with Uvicorn workers
+# Several workers: set CACHE_BACKEND=redis and CACHE_REDIS_URL (or REDIS_URL), otherwise each
+# worker keeps its own response cache and catalog invalidations do not reach the others
 exec gunicorn app.main:app \
     --bind 0.0.0.0:$PORT \
     --workers 4 \
@@ -0,0 +1,76 @@
+# tests/conftest.py
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Isolated SQLite database and upload directory, set before the app is imported
+TEST_DIR = Path(tempfile.mkdtemp(prefix="dzkitab-tests-"))
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DIR / 'test.db'}"
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["STORAGE_LOCAL_ROOT"] = str(TEST_DIR / "uploads")
+os.environ["COVER_DIR"] = str(TEST_DIR / "uploads" / "covers")
+os.environ["IMAGE_PROCESS_WORKERS"] = "0"
+(TEST_DIR / "uploads").mkdir()
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.database import Base, engine, SessionLocal
+from app.core.cache import response_cache
+from app.models.book import Book, Announcement
+from app.models.user import User
+from app.services.jwt import create_access_token
+from app.services.view_counter import view_counter
+
+
+@pytest.fixture(autouse=True)
+def database():
+    Base.metadata.create_all(bind=engine)
+    response_cache.clear()
+    yield
+    # Buffered views belong to this test's rows
+    view_counter.flush()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def user(db):
+    user = User(email="vendeur@dzkitab.dz", username="vendeur", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def auth_headers(user):
+    return {"Authorization": f"Bearer {create_access_token({'sub': user.email})}"}
+
+
+@pytest.fixture
+def announcement(db, user):
+    book = Book(isbn="9782070360024", title="L'Etranger", authors="Albert Camus")
+    db.add(book)
+    db.flush()
+    announcement = Announcement(book_id=book.id, user_id=user.id, price=500, condition="Neuf", category="Informatique")
+    db.add(announcement)
+    db.commit()
+    return announcement
@@ -0,0 +1,62 @@
+# tests/test_babelio_parser.py
+
+from pathlib import Path
+
+import pytest
+
+from app.services.babelio_parser import BACKENDS, parse_babelio_page
+
+PAGES_DIR = Path(__file__).resolve().parent.parent / "benchmarks" / "babelio_pages"
+
+EXPECTED = {
+    "9782070612758": {
+        "title": "Le Petit Prince",
+        "publisher": "Gallimard Jeunesse",
+        "page_count": 96,
+        "cover_image_url": "https://www.babelio.com/couv/CVT_Le-Petit-Prince_5947.jpg",
+    },
+    "9782070360024": {
+        "title": "L'Étranger",
+        "publisher": "Gallimard (30/11/1971)",
+        "page_count": 186,
+        "cover_image_url": "https://www.babelio.com/couv/CVT_LEtranger_5765.jpg",
+    },
+    "9782253004226": {
+        "title": "Le Rouge et le Noir",
+        "publisher": "Le Livre de Poche",
+        "page_count": 640,
+        "cover_image_url": "https://www.babelio.com/couv/CVT_Le-Rouge-et-le-Noir_7139.jpg",
+    },
+}
+
+
+def installed_backends():
+    backends = []
+    for name, backend_class in BACKENDS.items():
+        try:
+            backends.append(backend_class())
+        except ImportError:
+            continue
+    return backends
+
+
+def read_page(name: str) -> str:
+    return (PAGES_DIR / f"{name}.html").read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("isbn", sorted(EXPECTED))
+def test_backends_parse_saved_pages_identically(isbn):
+    html = read_page(isbn)
+
+    results = {backend.name: parse_babelio_page(html, isbn, backend) for backend in installed_backends()}
+
+    for name, result in results.items():
+        assert {field: result[field] for field in EXPECTED[isbn]} == EXPECTED[isbn], name
+    assert len({repr(result) for result in results.values()}) == 1
+
+
+def test_search_page_is_not_a_book_page():
+    html = read_page("search_no_result")
+
+    for backend in installed_backends():
+        assert parse_babelio_page(html, "9780000000000", backend) is None
@@ -0,0 +1,17 @@
+# tests/test_cache.py
+
+from app.core.cache import ANNOUNCEMENTS_NAMESPACE, RECOMMENDATIONS_NAMESPACE, response_cache
+
+
+def test_profile_update_invalidates_catalog_cache(client, auth_headers, announcement):
+    client.get("/api/books/announcements")
+    generations = {
+        namespace: response_cache.backend.get_generation(namespace)
+        for namespace in (ANNOUNCEMENTS_NAMESPACE, RECOMMENDATIONS_NAMESPACE)
+    }
+
+    response = client.put("/auth/me", json={"first_name": "Karim"}, headers=auth_headers)
+
+    assert response.status_code == 200
+    for namespace, generation in generations.items():
+        assert response_cache.backend.get_generation(namespace) > generation
@@ -0,0 +1,42 @@
+# tests/test_circuit_breaker.py
+
+import asyncio
+
+import pytest
+
+from app.services import isbn_scraper
+from app.services.isbn_scraper import HALF_OPEN, OPEN, IsbnProviderError, ProviderCircuitBreaker, call_provider
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = ProviderCircuitBreaker("openlibrary", slow_call_threshold=5)
+    breaker.state = HALF_OPEN
+    monkeypatch.setitem(isbn_scraper.provider_breakers, "openlibrary", breaker)
+    return breaker
+
+
+async def failing_provider():
+    raise KeyError("docs")
+
+
+async def working_provider():
+    return {"title": "Le Petit Prince"}
+
+
+def test_unexpected_provider_error_is_a_failure(breaker):
+    with pytest.raises(IsbnProviderError):
+        asyncio.run(call_provider("openlibrary", failing_provider()))
+
+    assert breaker.state == OPEN
+    assert breaker.total_calls == 1
+    assert not breaker._probe_in_flight
+
+
+def test_probe_is_released_after_an_unexpected_error(breaker, monkeypatch):
+    with pytest.raises(IsbnProviderError):
+        asyncio.run(call_provider("openlibrary", failing_provider()))
+
+    monkeypatch.setattr(isbn_scraper, "BREAKER_COOLDOWN", 0)
+    assert asyncio.run(call_provider("openlibrary", working_provider())) == {"title": "Le Petit Prince"}
+    assert breaker.state == "closed"
@@ -0,0 +1,62 @@
+# tests/test_conditional.py
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from app.core.cache import invalidate_catalog_cache
+from app.models.book import Announcement, Book
+
+
+def add_announcements(db, user, count):
+    book = Book(isbn="9782070612758", title="Le Petit Prince", authors="Antoine de Saint-Exupery")
+    db.add(book)
+    db.flush()
+    created = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    announcements = [
+        Announcement(
+            book_id=book.id, user_id=user.id, price=300 + i, condition="Neuf", category="Informatique",
+            created_at=created + timedelta(days=i)
+        )
+        for i in range(count)
+    ]
+    db.add_all(announcements)
+    db.commit()
+    return announcements
+
+
+def test_list_has_no_last_modified_and_ignores_if_modified_since(client, db, user, auth_headers):
+    announcements = add_announcements(db, user, 3)
+    first = client.get("/api/books/announcements", params={"limit": 2})
+    assert "last-modified" not in first.headers
+
+    response = client.delete(f"/api/books/announcements/{announcements[-1].id}", headers=auth_headers)
+    assert response.status_code == 200
+
+    since = format_datetime(datetime.now(timezone.utc) + timedelta(days=1), usegmt=True)
+    second = client.get("/api/books/announcements", params={"limit": 2}, headers={"If-Modified-Since": since})
+    assert second.status_code == 200
+    assert len(second.json()["announcements"]) == 2
+    assert second.headers["etag"] != first.headers["etag"]
+
+
+def test_list_etag_covers_embedded_seller(client, db, user, announcement):
+    first = client.get("/api/books/announcements")
+
+    user.username = "vendeur2"
+    db.commit()
+    invalidate_catalog_cache()
+
+    second = client.get("/api/books/announcements", headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 200
+    assert second.json()["announcements"][0]["user"]["username"] == "vendeur2"
+
+
+def test_detail_keeps_last_modified(client, announcement):
+    response = client.get(f"/api/books/announcements/{announcement.id}")
+
+    assert "last-modified" in response.headers
+    revalidated = client.get(
+        f"/api/books/announcements/{announcement.id}",
+        headers={"If-Modified-Since": response.headers["last-modified"]}
+    )
+    assert revalidated.status_code == 304
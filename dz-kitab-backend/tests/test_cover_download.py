@@ -0,0 +1,56 @@
+# tests/test_cover_download.py
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import cover_cache
+from app.services.cover_cache import download_cover
+
+COVER_URL = "https://covers.openlibrary.org/b/id/1-L.jpg"
+
+
+def fetch(handler, url=COVER_URL):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await download_cover(client, url)
+    return asyncio.run(run())
+
+
+def test_redirect_to_another_host_is_not_followed():
+    requested = []
+
+    def handler(request):
+        requested.append(request.url.host)
+        return httpx.Response(302, headers={"location": "http://169.254.169.254/latest/meta-data"})
+
+    with pytest.raises(ValueError, match="host not allowed"):
+        fetch(handler)
+    assert requested == ["covers.openlibrary.org"]
+
+
+def test_redirect_within_allowed_hosts_is_followed():
+    def handler(request):
+        if request.url.host == "covers.openlibrary.org":
+            return httpx.Response(302, headers={"location": "https://books.google.com/cover.jpg"})
+        return httpx.Response(200, headers={"content-type": "image/jpeg"}, content=b"jpeg")
+
+    assert fetch(handler) == b"jpeg"
+
+
+def test_oversized_cover_stops_streaming(monkeypatch):
+    monkeypatch.setattr(cover_cache, "COVER_MAX_BYTES", 10_000)
+    sent = []
+
+    async def body():
+        for _ in range(100):
+            sent.append(4096)
+            yield b"0" * 4096
+
+    def handler(request):
+        return httpx.Response(200, headers={"content-type": "image/jpeg"}, content=body())
+
+    with pytest.raises(ValueError, match="too large"):
+        fetch(handler)
+    assert sum(sent) < 20_000
@@ -0,0 +1,40 @@
+# tests/test_covers.py
+
+from app.models.book import Book
+from app.services.cover_cache import API_PUBLIC_URL
+
+REMOTE_COVER = "https://covers.openlibrary.org/b/isbn/9782070360024-L.jpg"
+
+
+def set_cover(db, announcement, url):
+    book = db.query(Book).filter(Book.id == announcement.book_id).first()
+    book.cover_image_url = url
+    db.commit()
+    return book
+
+
+def test_responses_keep_stored_cover_and_add_absolute_thumbnail(client, db, announcement):
+    set_cover(db, announcement, REMOTE_COVER)
+
+    full = client.get("/api/books/announcements").json()["announcements"][0]["book"]
+    card = client.get("/api/books/announcements?fields=card").json()["announcements"][0]
+    detail = client.get(f"/api/books/announcements/{announcement.id}").json()["book"]
+
+    for body in (full, card, detail):
+        assert body["cover_image_url"] == REMOTE_COVER
+        assert body["cover_thumbnail_url"].startswith(f"{API_PUBLIC_URL}/api/books/covers/")
+
+
+def test_update_ignores_thumbnail_url_sent_back(client, db, announcement, auth_headers):
+    set_cover(db, announcement, REMOTE_COVER)
+    thumbnail = client.get(f"/api/books/announcements/{announcement.id}").json()["book"]["cover_thumbnail_url"]
+
+    response = client.put(
+        f"/api/books/announcements/{announcement.id}",
+        json={"cover_image_url": thumbnail, "price": 600},
+        headers=auth_headers
+    )
+
+    assert response.status_code == 200
+    db.expire_all()
+    assert db.query(Book.cover_image_url).filter(Book.id == announcement.book_id).scalar() == REMOTE_COVER
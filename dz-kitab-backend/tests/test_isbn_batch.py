@@ -0,0 +1,62 @@
+# tests/test_isbn_batch.py
+
+import asyncio
+
+from app.services import isbn_cache
+
+
+def test_batch_skips_invalid_isbns_and_bounds_fan_out(db, monkeypatch):
+    isbns = [f"97820700{i:05d}" for i in range(30)]
+    looked_up, running, peak = [], 0, 0
+
+    async def openlibrary_batch(batch):
+        looked_up.extend(batch)
+        return {}
+
+    async def fetch(isbn, raise_on_error=False, known_records=None):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return None
+
+    monkeypatch.setattr(isbn_cache, "ISBN_BATCH_CONCURRENCY", 4)
+    monkeypatch.setattr(isbn_cache, "_openlibrary_batch", openlibrary_batch)
+    monkeypatch.setattr(isbn_cache, "fetch_book_by_isbn_scraping", fetch)
+
+    async def run():
+        return [result async for result in isbn_cache.lookup_book_infos(db, ["bad", "12345", "207-036-002-X", *isbns])]
+
+    results = asyncio.run(run())
+
+    assert results[:2] == [("bad", None), ("12345", None)]
+    assert looked_up == ["207036002X", *isbns]
+    assert len(results) == 33
+    assert peak == 4
+
+
+def test_lookup_is_cached_when_the_initiator_is_cancelled(db, monkeypatch):
+    gate = asyncio.Event()
+    book_info = {"isbn": "9782070612758", "title": "Le Petit Prince"}
+
+    async def fetch(isbn, raise_on_error=False, known_records=None):
+        await gate.wait()
+        return book_info
+
+    monkeypatch.setattr(isbn_cache, "fetch_book_by_isbn_scraping", fetch)
+
+    async def run():
+        initiator = asyncio.create_task(isbn_cache.lookup_book_info(db, "9782070612758"))
+        while not isbn_cache.isbn_lookups.in_flight("9782070612758"):
+            await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(isbn_cache.lookup_book_info(db, "9782070612758"))
+        await asyncio.sleep(0.01)
+        initiator.cancel()
+        await asyncio.sleep(0.01)
+        gate.set()
+        return await waiter
+
+    assert asyncio.run(run()) == book_info
+    db.expire_all()
+    assert isbn_cache.local_book_info(db, "9782070612758") == (True, book_info)
@@ -0,0 +1,15 @@
+# tests/test_local_storage.py
+
+from app.core.storage import STORED_FILE_MODE, LocalStorage
+
+
+def test_local_storage_publishes_files_with_umask_mode(tmp_path):
+    source = tmp_path / "source.jpg"
+    source.write_bytes(b"\xff\xd8\xff" + b"0" * 2048)
+    source.chmod(0o644)
+    local = LocalStorage(root=tmp_path / "uploads")
+
+    local.put_file(source, "books/stored.jpg", "image/jpeg")
+
+    stored = tmp_path / "uploads" / "books" / "stored.jpg"
+    assert stored.stat().st_mode & 0o777 == STORED_FILE_MODE
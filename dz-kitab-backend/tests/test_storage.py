@@ -0,0 +1,91 @@
+# tests/test_storage.py
+
+import pytest
+
+botocore_exceptions = pytest.importorskip("botocore.exceptions")
+boto3_exceptions = pytest.importorskip("boto3.exceptions")
+
+from app.core import storage as storage_module
+from app.core.storage import S3Storage, StorageError, StorageObjectNotFound
+
+from tests.test_upload import jpeg_bytes, upload
+
+
+class FailingS3Client:
+    """S3 client whose calls fail like an unreachable or misconfigured bucket"""
+
+    def __init__(self, error):
+        self.error = error
+
+    def head_object(self, **kwargs):
+        raise self.error
+
+    def upload_file(self, *args, **kwargs):
+        raise boto3_exceptions.S3UploadFailedError("Failed to upload: connection reset")
+
+    def download_file(self, *args, **kwargs):
+        raise self.error
+
+    def delete_object(self, **kwargs):
+        raise self.error
+
+    def generate_presigned_url(self, *args, **kwargs):
+        raise botocore_exceptions.NoCredentialsError()
+
+
+def client_error(code):
+    return botocore_exceptions.ClientError({"Error": {"Code": code, "Message": code}}, "HeadObject")
+
+
+def s3_storage(client) -> S3Storage:
+    s3 = S3Storage.__new__(S3Storage)
+    s3.bucket = "dzkitab-test"
+    s3.base_url = "http://minio.test/dzkitab-test"
+    s3._client = client
+    return s3
+
+
+@pytest.mark.parametrize("error", [
+    client_error("AccessDenied"),
+    botocore_exceptions.EndpointConnectionError(endpoint_url="http://minio.test"),
+])
+def test_s3_errors_are_storage_errors(tmp_path, error):
+    s3 = s3_storage(FailingS3Client(error))
+
+    with pytest.raises(StorageError):
+        s3.exists("books/x.jpg")
+    with pytest.raises(StorageError):
+        s3.put_file(tmp_path / "x.jpg", "books/x.jpg", "image/jpeg")
+    with pytest.raises(StorageError):
+        s3.get_file("books/x.jpg", tmp_path / "x.jpg")
+    with pytest.raises(StorageError):
+        s3.delete("books/x.jpg")
+    with pytest.raises(StorageError):
+        s3.presign_put("incoming/x.jpg", "image/jpeg", 1000)
+
+
+def test_missing_s3_object(tmp_path):
+    s3 = s3_storage(FailingS3Client(client_error("404")))
+
+    assert s3.exists("books/x.jpg") is False
+    with pytest.raises(StorageObjectNotFound):
+        s3.get_file("books/x.jpg", tmp_path / "x.jpg")
+
+
+def test_unavailable_storage_returns_503(client, auth_headers, monkeypatch):
+    local = storage_module.storage
+    saved = upload(client, auth_headers, jpeg_bytes()).json()
+
+    monkeypatch.setattr(storage_module, "storage", s3_storage(FailingS3Client(client_error("ServiceUnavailable"))))
+
+    response = upload(client, auth_headers, jpeg_bytes(color="red"))
+    assert response.status_code == 503
+    assert response.json()["detail"] == "Stockage des images indisponible"
+    assert client.delete(f"/api/images/delete/{saved['filename']}", headers=auth_headers).status_code == 503
+    presign = {"filename": "photo.jpg", "content_type": "image/jpeg", "size": 2000}
+    assert client.post("/api/images/presign", json=presign, headers=auth_headers).status_code == 503
+    complete = {"key": "incoming/0b6f6f5e-1b8c-4f0e-9a55-3c4b1f2d7e90.jpg"}
+    assert client.post("/api/images/complete", json=complete, headers=auth_headers).status_code == 503
+
+    monkeypatch.setattr(storage_module, "storage", local)
+    assert client.delete(f"/api/images/delete/{saved['filename']}", headers=auth_headers).status_code == 200
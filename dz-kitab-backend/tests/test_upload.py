@@ -0,0 +1,162 @@
+# tests/test_upload.py
+
+import io
+import os
+import asyncio
+import hashlib
+from pathlib import Path
+
+from fastapi import UploadFile
+from PIL import Image
+from starlette.datastructures import Headers
+
+from app.routers import upload as upload_router
+from app.services import image_variants
+
+
+def jpeg_bytes(size=(900, 1200), color="blue", exif=None) -> bytes:
+    buffer = io.BytesIO()
+    image = Image.new("RGB", size, color)
+    if exif is not None:
+        image.save(buffer, "JPEG", exif=exif.tobytes())
+    else:
+        image.save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def upload(client, headers, data, name="photo.jpg", content_type="image/jpeg"):
+    return client.post("/api/images/upload", files={"file": (name, data, content_type)}, headers=headers)
+
+
+def test_upload_is_served_by_the_app(client, auth_headers):
+    response = upload(client, auth_headers, jpeg_bytes())
+
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body["variants"]) == {"320", "640", "1280"}
+    served = client.get(body["url"])
+    assert served.status_code == 200
+    assert served.headers["content-type"] == "image/jpeg"
+    assert client.get(body["thumbnail_url"]).headers["content-type"] == "image/webp"
+
+
+def test_upload_rejects_non_images_and_oversized_files(client, auth_headers):
+    assert upload(client, auth_headers, b"hello" * 400).status_code == 400
+    oversized = b"\xff\xd8\xff" + b"0" * (6 * 1024 * 1024)
+    assert upload(client, auth_headers, oversized).json()["detail"] == "Fichier trop volumineux"
+
+
+def test_published_original_has_no_metadata(client, auth_headers):
+    exif = Image.Exif()
+    exif[0x010F] = "PhoneMaker"
+    exif[0x0112] = 6
+    exif[0x8825] = {1: "N", 2: (36.0, 45.0, 0.0)}
+    data = jpeg_bytes(size=(400, 200), exif=exif)
+
+    body = upload(client, auth_headers, data).json()
+    served = client.get(body["url"]).content
+
+    with Image.open(io.BytesIO(served)) as original:
+        assert not original.getexif()
+        assert original.size == (200, 400)
+    assert body["filename"].startswith(hashlib.sha256(data).hexdigest())
+    assert body["size"] == len(served)
+
+
+def test_original_without_metadata_is_stored_unchanged(client, auth_headers):
+    data = jpeg_bytes(color="yellow")
+
+    body = upload(client, auth_headers, data).json()
+
+    assert client.get(body["url"]).content == data
+
+
+def test_identical_upload_skips_image_processing(client, auth_headers, monkeypatch):
+    exif = Image.Exif()
+    exif[0x010F] = "PhoneMaker"
+    data = jpeg_bytes(exif=exif)
+    first = upload(client, auth_headers, data).json()
+
+    calls = []
+    sanitize = upload_router.sanitize_upload
+
+    async def counting_sanitize(path, image_format):
+        calls.append(path)
+        return await sanitize(path, image_format)
+
+    monkeypatch.setattr(upload_router, "sanitize_upload", counting_sanitize)
+    second = upload(client, auth_headers, data).json()
+
+    assert calls == []
+    assert second == first
+
+
+def test_image_workers_are_spawned(monkeypatch):
+    monkeypatch.setattr(image_variants, "IMAGE_PROCESS_WORKERS", 1)
+    monkeypatch.setattr(image_variants, "_process_pool", None)
+    try:
+        assert image_variants._get_process_pool()._mp_context.get_start_method() == "spawn"
+    finally:
+        image_variants.shutdown_process_pool()
+
+
+def test_original_is_negotiated_to_webp(client, auth_headers):
+    body = upload(client, auth_headers, jpeg_bytes()).json()
+
+    negotiated = client.get(body["url"], headers={"Accept": "image/webp,image/*,*/*;q=0.8"})
+    assert negotiated.headers["content-type"] == "image/webp"
+    assert negotiated.headers["vary"] == "Accept"
+    with Image.open(io.BytesIO(negotiated.content)) as image:
+        assert image.size == (900, 1200)
+
+    original = client.get(body["url"], headers={"Accept": "image/*"})
+    assert original.headers["content-type"] == "image/jpeg"
+    assert original.headers["etag"] != negotiated.headers["etag"]
+
+
+def test_etag_changes_when_a_variant_is_rewritten(client, auth_headers):
+    body = upload(client, auth_headers, jpeg_bytes()).json()
+    thumbnail = client.get(body["thumbnail_url"])
+    stored = Path(os.environ["STORAGE_LOCAL_ROOT"]) / "books" / body["thumbnail_url"].rsplit("/", 1)[1]
+
+    with Image.open(stored) as image:
+        image.save(stored, "WEBP", quality=30)
+
+    rewritten = client.get(body["thumbnail_url"], headers={"If-None-Match": thumbnail.headers["etag"]})
+    assert rewritten.status_code == 200
+    assert rewritten.headers["etag"] != thumbnail.headers["etag"]
+
+
+def test_cancelled_initiator_does_not_break_concurrent_upload(db, monkeypatch):
+    data = jpeg_bytes(color="green")
+    gate = asyncio.Event()
+    render = upload_router.process_upload
+
+    async def slow_process_upload(path):
+        await gate.wait()
+        return await render(path)
+
+    monkeypatch.setattr(upload_router, "process_upload", slow_process_upload)
+
+    async def receive():
+        file = UploadFile(io.BytesIO(data), filename="photo.jpg", headers=Headers({"content-type": "image/jpeg"}))
+        return await upload_router.receive_image_upload(file)
+
+    async def run():
+        first, second = await receive(), await receive()
+        initiator = asyncio.create_task(upload_router.store_image_upload(first, db))
+        while not upload_router.upload_processing.in_flight(first["sha256"]):
+            await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(upload_router.store_image_upload(second, db))
+        await asyncio.sleep(0.05)
+
+        initiator.cancel()
+        await asyncio.sleep(0.05)
+        gate.set()
+        return first, await waiter
+
+    first, saved = asyncio.run(run())
+
+    assert upload_router.get_storage().exists(f"books/{saved['filename']}")
+    assert set(saved["variants"]) == {"320", "640", "1280"}
+    assert not first["work_dir"].exists()
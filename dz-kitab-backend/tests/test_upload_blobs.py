@@ -0,0 +1,41 @@
+# tests/test_upload_blobs.py
+
+import pytest
+
+from app.core.storage import StorageError, get_storage
+from app.models.upload_blob import UploadBlob
+from app.services.upload_blobs import acquire_existing_blob, release_blob
+
+from tests.test_upload import jpeg_bytes, upload
+
+
+def test_files_are_deleted_with_the_last_reference(client, db, auth_headers):
+    data = jpeg_bytes(color="purple")
+    filename = upload(client, auth_headers, data).json()["filename"]
+    upload(client, auth_headers, data)
+    stored = f"books/{filename}"
+
+    assert client.delete(f"/api/images/delete/{filename}", headers=auth_headers).status_code == 200
+    assert get_storage().exists(stored)
+    assert client.delete(f"/api/images/delete/{filename}", headers=auth_headers).status_code == 200
+    assert not get_storage().exists(stored)
+    assert db.query(UploadBlob).count() == 0
+
+    assert upload(client, auth_headers, data).json()["filename"] == filename
+    assert get_storage().exists(stored)
+
+
+def test_failed_file_deletion_keeps_the_reference(client, db, auth_headers):
+    body = upload(client, auth_headers, jpeg_bytes(color="orange")).json()
+    digest = body["filename"].split(".")[0]
+
+    def unreachable_storage(filename):
+        raise StorageError("unreachable")
+
+    with pytest.raises(StorageError):
+        release_blob(db, body["filename"], unreachable_storage)
+
+    assert db.get(UploadBlob, digest).ref_count == 1
+    assert acquire_existing_blob(db, digest)["size"] == body["size"]
+    db.expire_all()
+    assert db.get(UploadBlob, digest).ref_count == 2
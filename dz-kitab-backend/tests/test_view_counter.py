@@ -0,0 +1,21 @@
+# tests/test_view_counter.py
+
+from app.models.book import Announcement
+from app.services.view_counter import view_counter
+
+
+def test_flush_does_not_change_announcement_etag(client, db, announcement):
+    first = client.get(f"/api/books/announcements/{announcement.id}")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    updated_at = db.query(Announcement.updated_at).filter(Announcement.id == announcement.id).scalar()
+
+    assert view_counter.flush() == 1
+
+    assert db.query(Announcement.updated_at).filter(Announcement.id == announcement.id).scalar() == updated_at
+    assert db.query(Announcement.views_count).filter(Announcement.id == announcement.id).scalar() == 1
+
+    second = client.get(f"/api/books/announcements/{announcement.id}")
+    assert second.headers["etag"] == etag
+    revalidated = client.get(f"/api/books/announcements/{announcement.id}", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
@@ -14,7 +14,7 @@ const AnimatedBookCard = ({ ann, index, navigate, truncateText }) => {
         <div ref={cardRef}>
             <BookCard
                 id={ann.id}
-                img={ann.book.cover_image_url || 'https://via.placeholder.com/150'}
+                img={ann.book.cover_thumbnail_url || ann.book.cover_image_url || 'https://via.placeholder.com/150'}
                 title={ann.book.title}
                 desc={truncateText(ann.description)}
                 price={`${ann.price} DA`}
@@ -296,7 +296,7 @@ const AnnouncementsAdmin = () => {
                   <div className="book-card">
                     <div className="book-image-wrapper">
                       <img
-                        src={ann.book?.cover_image_url || "https://via.placeholder.com/300x450"}
+                        src={ann.book?.cover_thumbnail_url || ann.book?.cover_image_url || "https://via.placeholder.com/300x450"}
                         alt={ann.book?.title}
                         className="book-image"
                         onError={(e) => { e.target.src = "https://via.placeholder.com/300x450?text=No+Image"; }}
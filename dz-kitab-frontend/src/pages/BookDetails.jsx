@@ -40,7 +40,7 @@ const BookDetails = () => {
           author: ann.book.authors,
           price: ann.price,
           rating: 4.5,
-          image: ann.book.cover_image_url || 'https://via.placeholder.com/150',
+          image: ann.book.cover_thumbnail_url || ann.book.cover_image_url || 'https://via.placeholder.com/150',
           domain: ann.category || 'General',
           description: ann.description,
           isbn: ann.book.isbn,
@@ -68,7 +68,7 @@ const BookDetails = () => {
           .map(a => ({
             id: a.id,
             title: a.book.title,
-            image: a.book.cover_image_url || 'https://via.placeholder.com/150',
+            image: a.book.cover_thumbnail_url || a.book.cover_image_url || 'https://via.placeholder.com/150',
             price: a.price,
             rating: 4.0
           }));
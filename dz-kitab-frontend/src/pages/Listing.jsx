@@ -49,7 +49,7 @@ const Listing = () => {
           author: ann.book.authors ? ann.book.authors.split(',') : ['Unknown'], // Ensure array
           price: ann.price,
           rating: 4.5,
-          image: ann.book.cover_image_url || 'https://via.placeholder.com/150',
+          image: ann.book.cover_thumbnail_url || ann.book.cover_image_url || 'https://via.placeholder.com/150',
           domain: ann.category || 'General',
           description: ann.description,
           isbn: ann.book.isbn,
@@ -343,7 +343,7 @@ const MyAnnouncements = () => {
                       <div className="book-image-wrapper">
                         <img
                           src={
-                            ann.book?.cover_image_url ||
+                            ann.book?.cover_thumbnail_url || ann.book?.cover_image_url ||
                             (ann.custom_images ? `${API_BASE_URL}${ann.custom_images}` : null) ||
                             "data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='300' height='450'%3E%3Crect width='300' height='450' fill='%23cccccc'/%3E%3Ctext x='50%25' y='50%25' dominant-baseline='middle' text-anchor='middle' font-family='Arial' font-size='20' fill='%23666666'%3ENo Image%3C/text%3E%3C/svg%3E"}
                           alt={ann.book?.title || "Book cover"}
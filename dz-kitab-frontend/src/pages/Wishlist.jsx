@@ -21,7 +21,7 @@ const Wishlist = () => {
         title: item.announcement.book.title,
         price: item.announcement.price,
         status: item.announcement.status,
-        image: item.announcement.book.cover_image_url || 'https://via.placeholder.com/150'
+        image: item.announcement.book.cover_thumbnail_url || item.announcement.book.cover_image_url || 'https://via.placeholder.com/150'
       }));
       setWishlistItems(items);
     } catch (error) {